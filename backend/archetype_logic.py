@@ -1,12 +1,16 @@
 # Archetype narrative generation logic
-import pymysql
+import os
 from typing import Dict, List, Tuple
 
-# DB connection helper (adjust as needed)
-def get_db():
-    return pymysql.connect(
-        host='localhost', user='root', password='', database='prism_db', charset='utf8mb4', cursorclass=pymysql.cursors.DictCursor
-    )
+from backend.cache import LRUCache
+from models.phrase_library import PHRASES
+
+# Narratives keyed by the canonical (category, subcategory, score) set, shared
+# across profiles and requests; entries are shared, so treat them as read-only.
+NARRATIVE_CACHE = LRUCache(
+    maxsize=int(os.getenv("ARCHETYPE_CACHE_SIZE", "1024")),
+    name="narrative",
+)
 
 TIER_MAP = {
     'Low': range(1, 4),
@@ -23,15 +27,8 @@ def get_tier(value: int) -> str:
         return 'Low'
 
 def get_descriptor_phrase(key: str, tier: str) -> str:
-    db = get_db()
-    try:
-        with db.cursor() as cursor:
-            sql = "SELECT descriptor_phrase FROM competency_descriptors WHERE competency_key=%s AND tier=%s"
-            cursor.execute(sql, (key, tier))
-            row = cursor.fetchone()
-            return row['descriptor_phrase'] if row else f'{key} ({tier})'
-    finally:
-        db.close()
+    # Served from the in-memory phrase index; never touches the database
+    return PHRASES.get_by_competency(key, tier) or f'{key} ({tier})'
 
 def flatten_skive(skive: Dict) -> List[Tuple[str, int]]:
     flat = []
@@ -43,8 +40,26 @@ def flatten_skive(skive: Dict) -> List[Tuple[str, int]]:
             flat.append((k, cat))
     return flat
 
+def skive_fingerprint(skive: Dict) -> Tuple[Tuple[str, str, int], ...]:
+    """Order-independent key for a nested (or flat) SKIVE dict."""
+    items = []
+    for k, cat in skive.items():
+        if isinstance(cat, dict):
+            items.extend((k, subk, v) for subk, v in cat.items())
+        elif isinstance(cat, int):
+            items.append(('', k, cat))
+    return tuple(sorted(items, key=lambda x: (x[0], x[1])))
+
 def generate_archetype_narrative(skive: Dict[str, Dict[str, int]]):
-    all_ratings = flatten_skive(skive)
+    fingerprint = skive_fingerprint(skive)
+    key = (PHRASES.version, fingerprint)
+    result = NARRATIVE_CACHE.get(key)
+    if result is None:
+        result = _build_archetype_narrative([(subk, v) for _, subk, v in fingerprint])
+        NARRATIVE_CACHE.set(key, result)
+    return result
+
+def _build_archetype_narrative(all_ratings: List[Tuple[str, int]]):
     sorted_ratings = sorted(all_ratings, key=lambda x: x[1], reverse=True)
     signature = sorted_ratings[:3]
     supporting = [x for x in sorted_ratings[3:] if x[1] >= 8]
@@ -0,0 +1,108 @@
+# In-process caches shared by the API handlers
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Bounded LRU map with an optional TTL and hit/miss counters.
+
+    Not thread-safe; it is only touched from the event loop.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: Optional[float] = None, name: str = ""):
+        self.maxsize = max(1, int(maxsize))
+        self.ttl = ttl if ttl and ttl > 0 else None
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+        value, expires = entry
+        if expires is not None and expires <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        self._data[key] = (value, expires)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class VersionTable:
+    """Bounded per-key version counters for versioned cache keys.
+
+    `bump` gives a key a new version from one process-wide clock, so numbers
+    are never reused. Only the `maxsize` most recently used keys keep their
+    own counter; every other key reads the highest version evicted so far,
+    which is at least as new as anything cached for an evicted key, so old
+    entries become unreachable instead of stale.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = max(1, int(maxsize))
+        self.evictions = 0
+        self._clock = 0
+        self._floor = 0
+        self._versions: "OrderedDict[Hashable, int]" = OrderedDict()
+
+    def get(self, key: Hashable) -> int:
+        version = self._versions.get(key)
+        if version is None:
+            return self._floor
+        self._versions.move_to_end(key)
+        return version
+
+    def bump(self, key: Hashable) -> int:
+        """Advance the key's version; returns the version it replaced."""
+        previous = self.get(key)
+        self._clock += 1
+        self._versions[key] = self._clock
+        self._versions.move_to_end(key)
+        while len(self._versions) > self.maxsize:
+            _, version = self._versions.popitem(last=False)
+            self._floor = max(self._floor, version)
+            self.evictions += 1
+        return previous
+
+    def __len__(self) -> int:
+        return len(self._versions)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"size": len(self._versions), "maxsize": self.maxsize, "evictions": self.evictions}
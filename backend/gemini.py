@@ -0,0 +1,240 @@
+# Shared plumbing for Gemini calls made by main.py and routes/ai_async.py
+import asyncio
+import hashlib
+import os
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+class GeminiBusy(RuntimeError):
+    """Raised instead of calling Gemini when the dispatcher sheds load."""
+
+
+def prompt_key(prompt: str) -> str:
+    """Identity of a prompt for coalescing: whitespace-normalized, hashed."""
+    return hashlib.sha256(re.sub(r"\s+", " ", prompt).strip().encode("utf-8")).hexdigest()
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Collapses concurrent calls that share a key into one in-flight call.
+
+    Every caller awaits the same task and gets its result or its exception.
+    A caller that is cancelled only stops waiting; the shared call is
+    cancelled once no caller is left waiting for it.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self.calls = 0
+        self.collapsed = 0
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    @staticmethod
+    def _settle(task: asyncio.Task) -> None:
+        # Mark the exception retrieved even when every waiter has gone
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        call = self._calls.get(key)
+        if call is None:
+            self.calls += 1
+            call = _Call(asyncio.ensure_future(factory()))
+            self._calls[key] = call
+            call.task.add_done_callback(self._settle)
+            call.task.add_done_callback(lambda _t, key=key, call=call: self._forget(key, call))
+        else:
+            self.collapsed += 1
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Every caller was cancelled; nobody wants the result
+                self._forget(key, call)
+                call.task.cancel()
+
+    def stats(self) -> Dict[str, int]:
+        return {"calls": self.calls, "collapsed": self.collapsed, "in_flight": len(self._calls)}
+
+
+# One per process: identical prompts from any endpoint share a call
+GEMINI_FLIGHTS = SingleFlight()
+
+
+class TokenBucket:
+    """Refills `rate` tokens per second up to `burst`; rate <= 0 disables it."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+
+    def reserve(self) -> float:
+        """Take a token; returns how long to wait before using it."""
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def refund(self) -> None:
+        if self.rate > 0:
+            self._tokens = min(self.burst, self._tokens + 1)
+
+
+class GeminiDispatcher:
+    """Bounds model calls: at most `max_in_flight` at once, at most
+    `max_queue` callers waiting for a slot, each for at most `queue_timeout`
+    seconds (rate-limit waits included), and a token bucket sized to the
+    provider quota. Shed calls raise GeminiBusy so handlers fall back at
+    once instead of after a failed round trip.
+    """
+
+    def __init__(self, max_in_flight: int = 8, max_queue: int = 64, queue_timeout: float = 5.0,
+                 rate_per_minute: float = 60, burst: int = 10):
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.max_queue = max(0, int(max_queue))
+        self.queue_timeout = queue_timeout
+        self.bucket = TokenBucket(rate_per_minute / 60.0, burst)
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+        self.queued = 0
+        self.max_queued = 0
+        self.calls = 0
+        self.failures = 0
+        self.rejected_queue_full = 0
+        self.rejected_deadline = 0
+        self.rate_limited = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+
+    @classmethod
+    def from_env(cls) -> "GeminiDispatcher":
+        return cls(
+            max_in_flight=int(os.getenv("GEMINI_MAX_IN_FLIGHT", "8")),
+            max_queue=int(os.getenv("GEMINI_MAX_QUEUE", "64")),
+            queue_timeout=int(os.getenv("GEMINI_QUEUE_TIMEOUT_MS", "5000")) / 1000.0,
+            rate_per_minute=float(os.getenv("GEMINI_RATE_PER_MINUTE", "60")),
+            burst=int(os.getenv("GEMINI_RATE_BURST", "10")),
+        )
+
+    @property
+    def slots(self) -> asyncio.Semaphore:
+        # Created on first use so it binds to the running loop
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+        return self._slots
+
+    async def _wait_for_slot(self, deadline: float) -> None:
+        if not self.slots.locked():
+            await self.slots.acquire()
+            return
+        if self.queued >= self.max_queue:
+            self.rejected_queue_full += 1
+            raise GeminiBusy("Gemini queue full")
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        try:
+            await asyncio.wait_for(self.slots.acquire(), timeout=max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            self.rejected_deadline += 1
+            raise GeminiBusy("Timed out waiting for a Gemini slot")
+        finally:
+            self.queued -= 1
+
+    async def run(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        started = time.monotonic()
+        deadline = started + self.queue_timeout
+        # Wait out the rate limit before taking a slot, so callers held back
+        # by the quota don't keep in-flight slots from the ones it admits
+        delay = self.bucket.reserve()
+        try:
+            if delay > 0:
+                if time.monotonic() + delay > deadline:
+                    self.rejected_deadline += 1
+                    raise GeminiBusy("Gemini rate limit would exceed the queue deadline")
+                self.rate_limited += 1
+                await asyncio.sleep(delay)
+            await self._wait_for_slot(deadline)
+        except BaseException:
+            # No call was made; hand the token back
+            self.bucket.refund()
+            raise
+        try:
+            waited = (time.monotonic() - started) * 1000
+            self.wait_ms_total += waited
+            self.wait_ms_max = max(self.wait_ms_max, waited)
+            self.calls += 1
+            self.in_flight += 1
+            try:
+                return await call()
+            except Exception:
+                self.failures += 1
+                raise
+            finally:
+                self.in_flight -= 1
+        finally:
+            self.slots.release()
+
+    def stats(self) -> Dict:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queued,
+            "max_queue_depth": self.max_queued,
+            "max_queue": self.max_queue,
+            "calls": self.calls,
+            "failures": self.failures,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_deadline": self.rejected_deadline,
+            "rate_limited": self.rate_limited,
+            "wait_ms_avg": round(self.wait_ms_total / self.calls, 2) if self.calls else 0.0,
+            "wait_ms_max": round(self.wait_ms_max, 2),
+        }
+
+
+class GeminiClient:
+    """The process's single, long-lived Gemini model handle.
+
+    Every AI call site goes through `generate`, which uses the model's async
+    transport (one reused channel instead of a model, and an executor
+    thread, per request), shares identical in-flight prompts, and admits
+    calls through the dispatcher.
+    """
+
+    def __init__(self, model, disabled: bool = False, dispatcher: Optional[GeminiDispatcher] = None):
+        self.model = model
+        self.disabled = disabled
+        self.dispatcher = dispatcher or GeminiDispatcher.from_env()
+
+    @property
+    def enabled(self) -> bool:
+        return self.model is not None and not self.disabled
+
+    async def generate(self, prompt: str):
+        if self.model is None:
+            raise RuntimeError("Gemini model not configured")
+        # Coalesce first so duplicate prompts don't take dispatcher slots
+        return await GEMINI_FLIGHTS.do(
+            prompt_key(prompt),
+            lambda: self.dispatcher.run(lambda: self.model.generate_content_async(prompt)),
+        )
+
+    def stats(self) -> Dict:
+        return {"dispatcher": self.dispatcher.stats(), "single_flight": GEMINI_FLIGHTS.stats()}
@@ -0,0 +1,72 @@
+# Compact rating model shared by the multi-radar and archetype code
+from typing import Dict, Iterable, List, Tuple
+
+from models.competency_keys import COMPETENCY_KEYS
+from models.phrase_library import get_proficiency_tier
+
+TIERS = ('low', 'medium', 'high')
+
+
+class Rating:
+    """One (category, subcategory, score) rating with its tier and canonical
+    competency key resolved once, at ingest.
+
+    Slotted so large profiles don't carry a dict per rating, and compared by
+    identity, so membership checks never fall back to comparing fields.
+    """
+
+    __slots__ = ("category", "subcategory", "key", "score", "tier")
+
+    def __init__(self, category: str, subcategory: str, score: float):
+        self.category = str(category).lower()
+        self.subcategory = subcategory
+        self.key = COMPETENCY_KEYS.resolve(subcategory)
+        self.score = float(score)
+        self.tier = get_proficiency_tier(self.score)
+
+    def __repr__(self) -> str:
+        return f"Rating({self.category!r}, {self.subcategory!r}, {self.score!r})"
+
+
+class RatingGroups:
+    """Ratings bucketed by category and by tier, each in input order."""
+
+    __slots__ = ("ratings", "by_category", "by_tier")
+
+    def __init__(self, ratings: List[Rating], by_category: Dict[str, List[Rating]], by_tier: Dict[str, List[Rating]]):
+        self.ratings = ratings
+        self.by_category = by_category
+        self.by_tier = by_tier
+
+
+def group_ratings(ratings: Iterable[Rating]) -> RatingGroups:
+    """Bucket ratings by category and tier in a single pass, without copying them."""
+    items: List[Rating] = []
+    by_category: Dict[str, List[Rating]] = {}
+    by_tier: Dict[str, List[Rating]] = {t: [] for t in TIERS}
+    for r in ratings:
+        items.append(r)
+        by_category.setdefault(r.category, []).append(r)
+        by_tier[r.tier].append(r)
+    return RatingGroups(items, by_category, by_tier)
+
+
+def _fingerprint_entry(r: Rating) -> Tuple[str, str, float]:
+    return (r.category, r.key, r.score)
+
+
+def ratings_fingerprint(ratings: Iterable[Rating]) -> Tuple[Tuple[str, str, float], ...]:
+    """Order-independent key for a set of (category, competency, score) ratings.
+
+    Profiles cloned from the same role template fingerprint identically, so
+    anything derived purely from their ratings can be shared between them.
+    Competencies are compared by canonical key, so spelling variants of a
+    subcategory share an entry.
+    """
+    return tuple(sorted(_fingerprint_entry(r) for r in ratings))
+
+
+def canonical_ratings(ratings: Iterable[Rating]) -> List[Rating]:
+    """The ratings in fingerprint order, so results memoized by fingerprint
+    don't depend on the order a profile listed them in."""
+    return sorted(ratings, key=_fingerprint_entry)
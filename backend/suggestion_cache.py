@@ -0,0 +1,156 @@
+# Two-tier cache for AI suggestions: in-process LRU in front of MySQL
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+from typing import Any, Dict, Optional
+
+from backend.cache import LRUCache
+from db import queries
+
+logger = logging.getLogger("prism.ai")
+
+
+class SuggestionCache:
+    """Caches generated suggestions by kind and normalized prompt.
+
+    Suggestion prompts depend only on the role context (profession,
+    department, role, path), so repeats are the norm. Lookups try the
+    process-local LRU first, then the `ai_suggestion_cache` table shared by
+    all workers; a database hit is promoted into the LRU. Database errors
+    are logged and treated as misses, never surfaced to the endpoint.
+    Callers store only output the model actually produced, never template
+    fallbacks. Expired rows are deleted by a periodic purge.
+    """
+
+    PURGE_BATCH = 1000
+
+    CREATE_TABLE = """
+        CREATE TABLE IF NOT EXISTS ai_suggestion_cache (
+            cache_key CHAR(64) PRIMARY KEY,
+            kind VARCHAR(32) NOT NULL,
+            payload JSON NOT NULL,
+            source VARCHAR(16) NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            expires_at DATETIME NOT NULL,
+            INDEX idx_ai_suggestion_cache_expires (expires_at)
+        )
+    """
+
+    def __init__(self, pool_manager, maxsize: int = 512, ttl: float = 3600, persist_ttl: int = 7 * 24 * 3600,
+                 purge_interval: int = 3600):
+        self.pool_manager = pool_manager
+        self.persist_ttl = int(persist_ttl)
+        self.purge_interval = int(purge_interval)
+        self.purged = 0
+        self._purge_timer: Optional[asyncio.Task] = None
+        self.memory = LRUCache(maxsize=maxsize, ttl=ttl, name="ai_suggestions")
+        self.db_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.db_errors = 0
+        self.served_by_source: Dict[str, int] = {}
+
+    @classmethod
+    def from_env(cls, pool_manager) -> "SuggestionCache":
+        return cls(
+            pool_manager,
+            maxsize=int(os.getenv("AI_CACHE_SIZE", "512")),
+            ttl=float(os.getenv("AI_CACHE_TTL", "3600")),
+            persist_ttl=int(os.getenv("AI_CACHE_PERSIST_TTL", str(7 * 24 * 3600))),
+            purge_interval=int(os.getenv("AI_CACHE_PURGE_INTERVAL", "3600")),
+        )
+
+    @staticmethod
+    def key(kind: str, prompt: str) -> str:
+        normalized = re.sub(r"\s+", " ", prompt).strip().lower()
+        return hashlib.sha256(f"{kind}\n{normalized}".encode("utf-8")).hexdigest()
+
+    def _served(self, entry: Dict) -> Dict:
+        source = entry.get("source", "")
+        self.served_by_source[source] = self.served_by_source.get(source, 0) + 1
+        return entry["value"]
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self.memory.get(key)
+        if entry is not None:
+            return self._served(entry)
+        try:
+            async with self.pool_manager.read_connection() as conn:
+                row = await queries.fetch_one(conn, queries.SUGGESTION_CACHE_GET, (key,))
+        except Exception as e:
+            self.db_errors += 1
+            logger.warning("Suggestion cache read failed: %s", e)
+            row = None
+        if not row:
+            self.misses += 1
+            return None
+        payload, source = row
+        entry = {"value": json.loads(payload) if isinstance(payload, (str, bytes)) else payload, "source": source}
+        self.memory.set(key, entry)
+        self.db_hits += 1
+        return self._served(entry)
+
+    async def set(self, key: str, kind: str, value: Any, source: str = "ai") -> None:
+        self.memory.set(key, {"value": value, "source": source})
+        self.stores += 1
+        try:
+            async with self.pool_manager.connection() as conn:
+                await queries.execute(
+                    conn, queries.SUGGESTION_CACHE_PUT,
+                    (key, kind, json.dumps(value), source, self.persist_ttl),
+                )
+                await conn.commit()
+        except Exception as e:
+            self.db_errors += 1
+            logger.warning("Suggestion cache write failed: %s", e)
+
+    async def purge_expired(self) -> int:
+        """Delete expired rows in batches so one purge never holds long locks."""
+        total = 0
+        while True:
+            async with self.pool_manager.connection() as conn:
+                deleted = await queries.execute(conn, queries.SUGGESTION_CACHE_PURGE, (self.PURGE_BATCH,))
+                await conn.commit()
+            total += deleted
+            if deleted < self.PURGE_BATCH:
+                break
+        self.purged += total
+        return total
+
+    def start_purge_timer(self) -> None:
+        if self.purge_interval > 0 and self._purge_timer is None:
+            self._purge_timer = asyncio.ensure_future(self._purge_loop())
+
+    async def _purge_loop(self) -> None:
+        while True:
+            try:
+                deleted = await self.purge_expired()
+                if deleted:
+                    logger.info("Purged %d expired suggestion cache rows", deleted)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Suggestion cache purge failed: %s", e)
+            await asyncio.sleep(self.purge_interval)
+
+    def stop(self) -> None:
+        if self._purge_timer is not None:
+            self._purge_timer.cancel()
+            self._purge_timer = None
+
+    def stats(self) -> Dict:
+        mem = self.memory.stats()
+        lookups = mem["hits"] + self.db_hits + self.misses
+        return {
+            "memory": mem,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "hit_rate": round((mem["hits"] + self.db_hits) / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "db_errors": self.db_errors,
+            "purged": self.purged,
+            "served_by_source": dict(self.served_by_source),
+        }
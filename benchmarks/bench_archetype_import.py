@@ -0,0 +1,75 @@
+"""
+archetype_info's non-AI overhead: per-request module load vs module-level import
+
+suggest_archetype_info used to load backend/archetype_logic.py with
+importlib.util.spec_from_file_location + exec_module on every request
+(file read, compile, module execution) before flattening and tiering the
+SKIVE profile. It now uses flatten_skive / get_tier imported once. Both
+variants run the handler's pre-model work on the same profile; times are
+per request.
+
+    python -m benchmarks.bench_archetype_import [--repeat 5] [--number 200]
+"""
+import argparse
+import ast
+import importlib.util
+import os
+import sys
+import timeit
+
+from backend.archetype_logic import flatten_skive, get_tier
+
+LOGIC_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend", "archetype_logic.py")
+
+PROFILE = repr({
+    "skills": {"decisionMaking": 9, "communication": 8, "dataAnalysis": 6, "negotiation": 4},
+    "knowledge": {"industryKnowledge": 7, "regulatoryKnowledge": 3},
+    "identity": {"professionalIdentity": 8},
+    "values": {"integrity": 9, "customerFocus": 5},
+    "ethics": {"moralReasoning": 7},
+})
+
+
+def _prepare(skive_str, flatten, tier):
+    try:
+        skive = ast.literal_eval(skive_str)
+    except Exception:
+        skive = {}
+    flat = flatten(skive) if skive else []
+    high = [k for k, v in flat if tier(v) == "High"]
+    medium = [k for k, v in flat if tier(v) == "Medium"]
+    return ", ".join(high) or "None", ", ".join(medium) or "None"
+
+
+def per_request_load():
+    """The handler before: load the module from disk, then prepare."""
+    spec = importlib.util.spec_from_file_location("archetype_logic", LOGIC_PATH)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["archetype_logic"] = module
+    spec.loader.exec_module(module)
+    return _prepare(PROFILE, module.flatten_skive, module.get_tier)
+
+
+def module_import():
+    return _prepare(PROFILE, flatten_skive, get_tier)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    assert per_request_load() == module_import()
+    print(f"best of {args.repeat} x {args.number} requests")
+    print(f"{'variant':<18} {'us/request':>11}")
+    try:
+        for name, fn in (("per_request_load", per_request_load), ("module_import", module_import)):
+            best = min(timeit.repeat(fn, repeat=args.repeat, number=args.number)) / args.number
+            print(f"{name:<18} {best * 1e6:>11.1f}")
+    finally:
+        sys.modules.pop("archetype_logic", None)
+
+
+if __name__ == "__main__":
+    main()
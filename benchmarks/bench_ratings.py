@@ -0,0 +1,104 @@
+"""
+Multi-radar rating pipeline: per-rating dicts vs the slotted Rating model
+
+Replays the pipeline's ingest, tiering and per-category grouping on a large
+profile (five SKIVE categories, ~1k ratings). The dict path is the code
+main.py ran before backend.ratings existed: a dict per rating, a
+`{**rating, 'tier'}` copy per rating when tiering, a regrouping into new
+dicts, and a rescan of the full list per category. Reports latency (timeit)
+and allocations (tracemalloc) for both.
+
+    python -m benchmarks.bench_ratings [--ratings 1000] [--repeat 5] [--number 50]
+"""
+import argparse
+import random
+import timeit
+import tracemalloc
+
+from backend.ratings import Rating, group_ratings
+from models.phrase_library import get_proficiency_tier
+
+CATEGORIES = ('skills', 'knowledge', 'identity', 'values', 'ethics')
+
+
+def make_skive(n: int, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    per_category = max(1, n // len(CATEGORIES))
+    return {
+        cat: {f"competency{cat.title()}{i}": rng.randint(1, 10) for i in range(per_category)}
+        for cat in CATEGORIES
+    }
+
+
+def dict_path(skive: dict):
+    # _ratings_from_skive_json
+    ratings = [
+        {'category': cat.lower(), 'subcategory': sub, 'score': float(val)}
+        for cat, subs in skive.items() for sub, val in subs.items()
+    ]
+    # compute_multi_radar's regrouping
+    categories = {}
+    for rating in ratings:
+        cat = rating['category'].lower()
+        categories.setdefault(cat, []).append({'subcategory': rating['subcategory'], 'score': float(rating['score'])})
+    out = {}
+    for cat in categories:
+        # The per-category rescan handed to generate_dynamic_archetype
+        category_ratings = [r for r in ratings if r['category'].lower() == cat.lower()]
+        # categorize_by_proficiency_tier
+        tiers = {'low': [], 'medium': [], 'high': []}
+        for rating in category_ratings:
+            tier = get_proficiency_tier(float(rating.get('score', 0)))
+            tiers[tier].append({**rating, 'tier': tier})
+        out[cat] = tiers
+    # The consolidated archetype tiers the full list once more
+    tiers = {'low': [], 'medium': [], 'high': []}
+    for rating in ratings:
+        tier = get_proficiency_tier(float(rating.get('score', 0)))
+        tiers[tier].append({**rating, 'tier': tier})
+    out['consolidated'] = tiers
+    return out
+
+
+def rating_path(skive: dict):
+    ratings = [Rating(cat.lower(), sub, val) for cat, subs in skive.items() for sub, val in subs.items()]
+    groups = group_ratings(ratings)
+    out = {cat: group_ratings(cat_ratings).by_tier for cat, cat_ratings in groups.by_category.items()}
+    out['consolidated'] = groups.by_tier
+    return out
+
+
+def allocations(fn, skive: dict):
+    """(blocks, peak bytes) allocated while fn runs and its result is alive."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        result = fn(skive)
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, 'filename') if stat.count_diff > 0)
+    del result
+    return blocks, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--ratings', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--number', type=int, default=50)
+    args = parser.parse_args()
+
+    skive = make_skive(args.ratings)
+    total = sum(len(subs) for subs in skive.values())
+    print(f"{total} ratings in {len(skive)} categories, best of {args.repeat} x {args.number} runs")
+    print(f"{'path':<8} {'ms/profile':>11} {'blocks':>8} {'peak KiB':>9}")
+    for name, fn in (('dict', dict_path), ('rating', rating_path)):
+        best = min(timeit.repeat(lambda: fn(skive), repeat=args.repeat, number=args.number)) / args.number
+        blocks, peak = allocations(fn, skive)
+        print(f"{name:<8} {best * 1000:>11.3f} {blocks:>8} {peak / 1024:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Role-context lookup: three id->name SELECTs vs queries.ROLE_CONTEXT_NAMES
+
+_resolve_role_context used to send one SELECT per id (profession,
+department, role) on a single cursor; it now sends the registered
+ROLE_CONTEXT_NAMES statement once. Both paths run against the database
+configured by the usual DB_* variables (.env is loaded like main.py does),
+from `--concurrency` workers sharing one pool, and the script reports
+lookups per second and per-lookup latency for each.
+
+    python -m benchmarks.bench_role_context [--lookups 2000] [--concurrency 8]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from dotenv import load_dotenv
+
+from db import queries
+from db.pool import PoolManager
+
+PROFESSION_SQL = "SELECT name FROM professions WHERE id=%s"
+DEPARTMENT_SQL = "SELECT name FROM departments WHERE id=%s"
+ROLE_SQL = "SELECT name FROM roles WHERE id=%s"
+
+SAMPLE_IDS = """
+    SELECT d.profession_id, r.department_id, r.id
+    FROM roles r JOIN departments d ON d.id = r.department_id
+    ORDER BY r.id LIMIT 50
+"""
+
+
+async def three_queries(conn, ids):
+    """The previous _resolve_role_context body."""
+    ctx = {}
+    cur = await conn.cursor()
+    try:
+        for name, sql, value in zip(("profession", "department", "role"), (PROFESSION_SQL, DEPARTMENT_SQL, ROLE_SQL), ids):
+            await cur.execute(sql, (value,))
+            row = await cur.fetchone()
+            ctx[name] = row[0] if row else ""
+    finally:
+        await cur.close()
+    return ctx
+
+
+async def one_query(conn, ids):
+    row = await queries.fetch_one(conn, queries.ROLE_CONTEXT_NAMES, ids)
+    return dict(zip(("profession", "department", "role"), (v or "" for v in row)))
+
+
+async def run(pool: PoolManager, lookup, samples, lookups: int, concurrency: int):
+    latencies = []
+    remaining = iter(range(lookups))
+
+    async def worker():
+        for i in remaining:
+            started = time.perf_counter()
+            async with pool.connection() as conn:
+                await lookup(conn, samples[i % len(samples)])
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "lookups_per_s": lookups / elapsed,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+async def main_async(args) -> None:
+    pool = PoolManager.from_env()
+    pool.maxsize = max(pool.maxsize, args.concurrency)
+    await pool.start()
+    try:
+        async with pool.connection() as conn:
+            cur = await conn.cursor()
+            await cur.execute(SAMPLE_IDS)
+            samples = [tuple(row) for row in await cur.fetchall()]
+            await cur.close()
+            if not samples:
+                raise SystemExit("No roles in the database; seed it first (start the API once).")
+            # Same answers from both paths before timing them
+            for ids in samples:
+                assert await three_queries(conn, ids) == await one_query(conn, ids), ids
+
+        print(f"{args.lookups} lookups over {len(samples)} role ids, {args.concurrency} concurrent workers")
+        print(f"{'path':<14} {'lookups/s':>10} {'mean ms':>8} {'p95 ms':>8}")
+        for name, lookup in (("three_queries", three_queries), ("one_query", one_query)):
+            await run(pool, lookup, samples, min(args.lookups, 200), args.concurrency)  # warm up
+            result = await run(pool, lookup, samples, args.lookups, args.concurrency)
+            print(f"{name:<14} {result['lookups_per_s']:>10.0f} {result['mean_ms']:>8.2f} {result['p95_ms']:>8.2f}")
+    finally:
+        await pool.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    load_dotenv()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
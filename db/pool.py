@@ -0,0 +1,712 @@
+# db/pool.py - shared aiomysql pool for main.py and the async routers
+import os
+import json
+import time
+import asyncio
+import logging
+import re
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Dict, List, Optional, Set
+
+import aiomysql
+
+logger = logging.getLogger("prism.db")
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.getenv(name)
+    if raw is None or raw.strip() == "":
+        return default
+    try:
+        return int(raw)
+    except ValueError:
+        logger.warning("Invalid %s=%r, using default %d", name, raw, default)
+        return default
+
+
+# CR_SERVER_GONE_ERROR / CR_SERVER_LOST
+_DISCONNECT_ERRNOS = {2006, 2013}
+
+
+def _is_disconnect(exc: BaseException) -> bool:
+    if isinstance(exc, aiomysql.OperationalError):
+        return bool(exc.args) and exc.args[0] in _DISCONNECT_ERRNOS
+    # aiomysql surfaces a dropped socket as InterfaceError, or as an
+    # AttributeError once the connection's _reader has been reset to None.
+    return isinstance(exc, (aiomysql.InterfaceError, AttributeError, ConnectionError))
+
+
+def _never_sent(exc: BaseException) -> bool:
+    """True when the statement provably never reached the server.
+
+    2006 is raised when writing the request fails, InterfaceError and the
+    AttributeError when the socket was already gone before writing. 2013
+    (lost *during* the query) and a bare ConnectionError may arrive after
+    the server ran, and with autocommit committed, the statement.
+    """
+    if isinstance(exc, aiomysql.OperationalError):
+        return bool(exc.args) and exc.args[0] == 2006
+    return isinstance(exc, (aiomysql.InterfaceError, AttributeError))
+
+
+_READ_ONLY = re.compile(r"^\s*(SELECT|SHOW|DESCRIBE|DESC|EXPLAIN)\b", re.IGNORECASE)
+
+
+def _safe_to_retry(query, exc: BaseException) -> bool:
+    if not _is_disconnect(exc):
+        return False
+    return _never_sent(exc) or bool(_READ_ONLY.match(query if isinstance(query, str) else ""))
+
+
+class _CursorContext:
+    """Mirror aiomysql's cursor(): usable with `await` and `async with`."""
+
+    def __init__(self, make):
+        self._make = make
+        self._cursor = None
+
+    def __await__(self):
+        return self._make().__await__()
+
+    async def __aenter__(self):
+        self._cursor = await self._make()
+        return self._cursor
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._cursor.close()
+
+
+class _RetryingCursor:
+    """Cursor proxy that retries the checkout's first query once after a
+    disconnect, when doing so cannot apply the statement twice."""
+
+    def __init__(self, handle: "PooledConnection", cursor):
+        self._handle = handle
+        self._cursor = cursor
+
+    async def execute(self, query, args=None):
+        first = not self._handle._executed
+        self._handle._executed = True
+        try:
+            return await self._cursor.execute(query, args)
+        except Exception as exc:
+            if not (first and _safe_to_retry(query, exc)):
+                raise
+            logger.info("Stale MySQL connection on first query, reconnecting once: %s", exc)
+            await self._handle._reconnect()
+            return await self._cursor.execute(query, args)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._cursor.close()
+
+    def __aiter__(self):
+        return self._cursor.__aiter__()
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class PooledConnection:
+    """A connection checked out of PoolManager.
+
+    Nothing is sent to the server on checkout. If the first statement finds
+    the socket dead (idle kill, failover) the connection is reopened and that
+    statement retried once, but only when the retry cannot duplicate work:
+    either the request was never sent, or the statement is read-only. A
+    write that loses the connection mid-query (2013) may already be
+    committed, so that error is raised to the caller instead.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._executed = False
+
+    @property
+    def raw(self):
+        return self._conn
+
+    async def _reconnect(self) -> None:
+        await self._conn.ping(reconnect=True)
+
+    def cursor(self, *cursors):
+        async def _make():
+            try:
+                cur = await self._conn.cursor(*cursors)
+            except Exception as exc:
+                if self._executed or not _is_disconnect(exc):
+                    raise
+                await self._reconnect()
+                cur = await self._conn.cursor(*cursors)
+            return _RetryingCursor(self, cur)
+        return _CursorContext(_make)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class LazyConnection:
+    """Connection handle that checks out from the pool on first use.
+
+    `checkout` is a zero-argument callable returning one of PoolManager's
+    connection context managers. Handlers that are done with the database
+    call `await conn.release()` so the pooled connection goes back before
+    any slow non-DB work; using the handle again checks out a fresh one.
+    """
+
+    def __init__(self, checkout):
+        self._checkout = checkout
+        self._cm = None
+        self._conn: Optional[PooledConnection] = None
+
+    @property
+    def acquired(self) -> bool:
+        return self._conn is not None
+
+    async def acquire(self) -> PooledConnection:
+        if self._conn is None:
+            cm = self._checkout()
+            self._conn = await cm.__aenter__()
+            self._cm = cm
+        return self._conn
+
+    async def release(self) -> None:
+        cm, self._cm, self._conn = self._cm, None, None
+        if cm is not None:
+            await cm.__aexit__(None, None, None)
+
+    def cursor(self, *cursors):
+        async def _make():
+            conn = await self.acquire()
+            return await conn.cursor(*cursors)
+        return _CursorContext(_make)
+
+    async def commit(self) -> None:
+        if self._conn is not None:
+            await self._conn.commit()
+
+    async def rollback(self) -> None:
+        # Nothing to roll back if no query ever ran
+        if self._conn is not None:
+            await self._conn.rollback()
+
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise AttributeError(f"{name!r} needs a checked-out connection; call acquire() first")
+        return getattr(self._conn, name)
+
+
+class PoolMetrics:
+    """Acquire-wait histogram, saturation events and connection lifetimes.
+
+    Lifetimes run from the first checkout we observe to the point the
+    connection is found closed or gone from the pool.
+    """
+
+    # Upper bounds in milliseconds; the last bucket catches everything slower
+    WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+    LIFETIME_BUCKETS_S = (10, 60, 300, 900, 3600)
+
+    def __init__(self):
+        self.acquisitions = 0
+        self.saturated_acquisitions = 0
+        self.acquire_errors = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.wait_histogram: List[int] = [0] * (len(self.WAIT_BUCKETS_MS) + 1)
+        self.lifetime_histogram: List[int] = [0] * (len(self.LIFETIME_BUCKETS_S) + 1)
+        self.connections_retired = 0
+        self._born: Dict[object, float] = {}
+        self._last_saturation_log = 0.0
+
+    @staticmethod
+    def _bucket(bounds, value) -> int:
+        for i, bound in enumerate(bounds):
+            if value <= bound:
+                return i
+        return len(bounds)
+
+    def record_acquire(self, wait_ms: float, saturated: bool) -> bool:
+        """Record one checkout; returns True when a saturation log is due."""
+        self.acquisitions += 1
+        self.wait_total_ms += wait_ms
+        self.wait_max_ms = max(self.wait_max_ms, wait_ms)
+        self.wait_histogram[self._bucket(self.WAIT_BUCKETS_MS, wait_ms)] += 1
+        if not saturated:
+            return False
+        self.saturated_acquisitions += 1
+        now = time.monotonic()
+        if now - self._last_saturation_log >= 10:
+            self._last_saturation_log = now
+            return True
+        return False
+
+    def track(self, conn, pool) -> None:
+        now = time.monotonic()
+        self._born.setdefault(conn, now)
+        live = set(pool._free) | set(pool._used) if pool is not None else set()
+        for tracked in [c for c in self._born if c.closed or c not in live]:
+            self.record_lifetime(now - self._born.pop(tracked))
+
+    def record_lifetime(self, seconds: float) -> None:
+        self.connections_retired += 1
+        self.lifetime_histogram[self._bucket(self.LIFETIME_BUCKETS_S, seconds)] += 1
+
+    def snapshot(self) -> Dict:
+        def labelled(bounds, counts, unit):
+            labels = [f"le_{b}{unit}" for b in bounds] + ["inf"]
+            return dict(zip(labels, counts))
+
+        return {
+            "acquisitions": self.acquisitions,
+            "saturated_acquisitions": self.saturated_acquisitions,
+            "acquire_errors": self.acquire_errors,
+            "acquire_wait_avg_ms": round(self.wait_total_ms / self.acquisitions, 3) if self.acquisitions else 0.0,
+            "acquire_wait_max_ms": round(self.wait_max_ms, 3),
+            "acquire_wait_histogram": labelled(self.WAIT_BUCKETS_MS, self.wait_histogram, "ms"),
+            "connections_tracked": len(self._born),
+            "connections_retired": self.connections_retired,
+            "connection_lifetime_histogram": labelled(self.LIFETIME_BUCKETS_S, self.lifetime_histogram, "s"),
+        }
+
+
+class PoolManager:
+    """Own the single process-wide MySQL pool: sizing, recycling and shutdown.
+
+    Every router and `get_db_connection` acquire from this one pool so the
+    whole connection budget (DB_POOL_MAXSIZE) is shared instead of split.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: Optional[str],
+        password: Optional[str],
+        db: Optional[str],
+        minsize: int = 1,
+        maxsize: int = 15,
+        pool_recycle: int = 280,
+        validation: str = "background",
+        liveness_interval: int = 30,
+        idle_check_after: int = 60,
+        rebuild_backoff: float = 0.5,
+        rebuild_backoff_max: float = 30.0,
+        stats_log_interval: int = 60,
+        name: str = "primary",
+    ):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.db = db
+        self.minsize = max(0, minsize)
+        self.maxsize = max(1, maxsize, self.minsize)
+        self.pool_recycle = pool_recycle
+        # "background": idle connections are pinged by a periodic task and the
+        # first query of a checkout is retried once on a dropped socket.
+        # "ping": COM_PING every connection on checkout (one extra round trip).
+        self.validation = validation if validation in ("background", "ping") else "background"
+        self.liveness_interval = liveness_interval
+        self.idle_check_after = idle_check_after
+        self.wait_timeout: Optional[int] = None
+        self._pool: Optional[aiomysql.Pool] = None
+        self._retiring: Set[asyncio.Task] = set()
+        self._liveness_task: Optional[asyncio.Task] = None
+        self._pinged_at: Dict[object, float] = {}
+        # Rebuild coordination: one rebuild at a time, keyed by generation so
+        # callers that saw an older pool reuse the replacement.
+        self.rebuild_backoff = rebuild_backoff
+        self.rebuild_backoff_max = rebuild_backoff_max
+        self.generation = 0
+        self.rebuilds = 0
+        self.rebuild_failures = 0
+        self._rebuild_attempts = 0
+        self._consecutive_failures = 0
+        self._retry_after = 0.0
+        self._last_rebuild_error: Optional[BaseException] = None
+        self._lock: Optional[asyncio.Lock] = None
+        # Optional read replica (a PoolManager of its own) and the clients that
+        # wrote recently and must keep reading from the primary until expiry.
+        self.replica: Optional["PoolManager"] = None
+        self.read_your_writes_seconds = 5.0
+        self._recent_writers: Dict[str, float] = {}
+        # After a failed replica checkout, reads use the primary for a while
+        self.replica_retry_seconds = 5.0
+        self._replica_down_until = 0.0
+        self.replica_fallbacks = 0
+        self.name = name
+        self.metrics = PoolMetrics()
+        self.stats_log_interval = stats_log_interval
+        self._stats_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls, prefix: str = "DB", base: Optional["PoolManager"] = None) -> "PoolManager":
+        """Build a manager from `{prefix}_*` env vars.
+
+        The primary uses DB_HOST, DB_POOL_MAXSIZE, ... . When DB_REPLICA_HOST is
+        set a replica manager is attached, reading DB_REPLICA_* and falling back
+        to the primary's credentials and sizing for anything left unset.
+        """
+        def env(name: str, default):
+            return os.getenv(f"{prefix}_{name}", default)
+
+        def env_int(name: str, default: int) -> int:
+            return _env_int(f"{prefix}_{name}", default)
+
+        manager = cls(
+            host=env("HOST", base.host if base else "localhost"),
+            port=env_int("PORT", base.port if base else 3306),
+            user=env("USER", base.user if base else None),
+            password=env("PASSWORD", base.password if base else None),
+            db=env("NAME", base.db if base else None),
+            minsize=env_int("POOL_MINSIZE", base.minsize if base else 1),
+            maxsize=env_int("POOL_MAXSIZE", base.maxsize if base else 15),
+            # Recycle connections before MySQL wait_timeout
+            pool_recycle=env_int("POOL_RECYCLE", base.pool_recycle if base else 280),
+            validation=os.getenv("DB_POOL_VALIDATION", "background").strip().lower(),
+            liveness_interval=_env_int("DB_POOL_LIVENESS_INTERVAL", 30),
+            idle_check_after=_env_int("DB_POOL_IDLE_CHECK", 60),
+            rebuild_backoff=_env_int("DB_POOL_REBUILD_BACKOFF_MS", 500) / 1000.0,
+            rebuild_backoff_max=_env_int("DB_POOL_REBUILD_BACKOFF_MAX_MS", 30000) / 1000.0,
+            stats_log_interval=_env_int("DB_POOL_STATS_LOG_INTERVAL", 60),
+            name="replica" if base is not None else "primary",
+        )
+        if base is None and os.getenv("DB_REPLICA_HOST"):
+            manager.replica = cls.from_env("DB_REPLICA", base=manager)
+            manager.read_your_writes_seconds = _env_int("DB_READ_YOUR_WRITES_MS", 5000) / 1000.0
+            manager.replica_retry_seconds = _env_int("DB_REPLICA_RETRY_MS", 5000) / 1000.0
+        return manager
+
+    @property
+    def pool(self) -> Optional[aiomysql.Pool]:
+        return self._pool
+
+    @property
+    def closed(self) -> bool:
+        return self._pool is None or self._pool.closed
+
+    async def _create_pool(self) -> aiomysql.Pool:
+        return await aiomysql.create_pool(
+            host=self.host,
+            port=self.port,
+            user=self.user,
+            password=self.password,
+            db=self.db,
+            minsize=self.minsize,
+            maxsize=self.maxsize,
+            pool_recycle=self.pool_recycle,
+            autocommit=True,
+        )
+
+    @property
+    def _rebuild_lock(self) -> asyncio.Lock:
+        # Created lazily so the manager can be built before the event loop runs
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def start(self) -> None:
+        if not self.closed:
+            return
+        async with self._rebuild_lock:
+            if not self.closed:
+                return
+            self._pool = await self._create_pool()
+            logger.info(
+                "MySQL connection pool created (minsize=%d, maxsize=%d, recycle=%ds).",
+                self.minsize, self.maxsize, self.pool_recycle,
+            )
+        await self._align_recycle_with_wait_timeout()
+        if self.replica is not None:
+            try:
+                await self.replica.start()
+            except Exception as e:
+                # Reads fall back to the primary rather than failing startup
+                logger.error("MySQL read replica unavailable, routing reads to primary: %s", e)
+                self.replica = None
+        if self.validation == "background" and self.liveness_interval > 0 and self._liveness_task is None:
+            self._liveness_task = asyncio.ensure_future(self._liveness_loop())
+        if self.stats_log_interval > 0 and self._stats_task is None:
+            self._stats_task = asyncio.ensure_future(self._stats_log_loop())
+
+    async def _align_recycle_with_wait_timeout(self) -> None:
+        """Keep pool_recycle below the server's wait_timeout so idle sockets are
+        replaced by us before MySQL silently drops them."""
+        try:
+            async with self._pool.acquire() as conn:
+                async with conn.cursor() as cur:
+                    await cur.execute("SELECT @@SESSION.wait_timeout")
+                    row = await cur.fetchone()
+            self.wait_timeout = int(row[0])
+        except Exception as e:
+            logger.warning("Could not read MySQL wait_timeout: %s", e)
+            return
+        limit = self.wait_timeout - 10
+        if limit > 0 and (self.pool_recycle < 0 or self.pool_recycle > limit):
+            logger.warning(
+                "DB_POOL_RECYCLE=%d is not below wait_timeout=%d; recycling after %ds instead.",
+                self.pool_recycle, self.wait_timeout, limit,
+            )
+            self.pool_recycle = limit
+            # aiomysql has no public setter for an existing pool
+            self._pool._recycle = limit
+
+    async def _liveness_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.liveness_interval)
+            try:
+                await self._check_idle_connections()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Idle connection check failed: %s", e)
+
+    async def _stats_log_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.stats_log_interval)
+            logger.info("db_pool_stats %s", json.dumps(self.stats(include_replica=False), sort_keys=True))
+
+    def stats(self, include_replica: bool = True) -> Dict:
+        """Point-in-time pool occupancy plus cumulative acquire metrics."""
+        pool = self._pool
+        size = pool.size if pool is not None else 0
+        free = pool.freesize if pool is not None else 0
+        out = {
+            "pool": self.name,
+            "maxsize": self.maxsize,
+            "size": size,
+            "in_use": size - free,
+            "free": free,
+            "generation": self.generation,
+            "rebuilds": self.rebuilds,
+            "rebuild_failures": self.rebuild_failures,
+            **self.metrics.snapshot(),
+        }
+        if include_replica and self.replica is not None:
+            out["replica"] = self.replica.stats()
+            out["replica_fallbacks"] = self.replica_fallbacks
+        return out
+
+    async def _check_idle_connections(self) -> None:
+        """Ping free connections nobody has used or pinged for idle_check_after seconds.
+
+        ping() doesn't update aiomysql's last_usage, and released connections
+        go to the back of the free list, so the list isn't ordered by idle
+        time: walk a snapshot of all of it and keep our own ping times.
+        """
+        pool = self._pool
+        if pool is None or pool.closed:
+            return
+        loop = asyncio.get_running_loop()
+        free = list(pool._free)
+        live = set(free) | set(pool._used)
+        self._pinged_at = {c: t for c, t in self._pinged_at.items() if c in live}
+        for conn in free:
+            last = max(conn.last_usage, self._pinged_at.get(conn, 0.0))
+            if loop.time() - last < self.idle_check_after:
+                continue
+            # Take it out of the free list so nobody checks it out mid-ping
+            try:
+                pool._free.remove(conn)
+            except ValueError:
+                continue
+            pool._used.add(conn)
+            try:
+                await conn.ping(reconnect=False)
+                self._pinged_at[conn] = loop.time()
+            except Exception as e:
+                logger.info("Dropping dead idle MySQL connection: %s", e)
+                self._pinged_at.pop(conn, None)
+                conn.close()
+            finally:
+                await pool.release(conn)
+
+    async def rebuild(self, seen_generation: Optional[int] = None) -> None:
+        """Replace the pool once, however many requests noticed it was broken.
+
+        `seen_generation` is the generation the caller acquired from. If the
+        pool has been rebuilt since, the caller just uses the replacement.
+        Concurrent callers park on the lock; if the attempt they waited on
+        failed they get its error instead of retrying, and new attempts are
+        spaced out with exponential backoff.
+        """
+        if seen_generation is None:
+            seen_generation = self.generation
+        attempts_seen = self._rebuild_attempts
+        async with self._rebuild_lock:
+            if self.generation != seen_generation and not self.closed:
+                return
+            if self._rebuild_attempts != attempts_seen and self._last_rebuild_error is not None:
+                raise self._last_rebuild_error
+            loop = asyncio.get_running_loop()
+            if self._last_rebuild_error is not None and loop.time() < self._retry_after:
+                raise self._last_rebuild_error
+            self._rebuild_attempts += 1
+            old = self._pool
+            try:
+                self._pool = await self._create_pool()
+            except Exception as e:
+                self.rebuild_failures += 1
+                self._consecutive_failures += 1
+                backoff = min(
+                    self.rebuild_backoff_max,
+                    self.rebuild_backoff * (2 ** (self._consecutive_failures - 1)),
+                )
+                self._retry_after = loop.time() + backoff
+                self._last_rebuild_error = e
+                logger.error(
+                    "MySQL pool rebuild failed (%d in a row), next attempt allowed in %.1fs: %s",
+                    self._consecutive_failures, backoff, e,
+                )
+                raise
+            self.generation += 1
+            self.rebuilds += 1
+            self._consecutive_failures = 0
+            self._last_rebuild_error = None
+            logger.warning(
+                "MySQL connection pool rebuilt (generation=%d, rebuilds=%d).",
+                self.generation, self.rebuilds,
+            )
+        if old is not None:
+            self._retire(old)
+
+    def _retire(self, pool: aiomysql.Pool) -> None:
+        # Connections still checked out are closed when released, so waiting
+        # inline could deadlock a caller that holds one of them.
+        pool.close()
+        task = asyncio.ensure_future(pool.wait_closed())
+        self._retiring.add(task)
+        task.add_done_callback(self._retiring.discard)
+
+    def acquire(self):
+        """Return the pool's acquire context manager (`async with` or `await`)."""
+        return self._pool.acquire()
+
+    @asynccontextmanager
+    async def connection(self):
+        """Check out a PooledConnection; the hot path sends no validation query."""
+        if self.closed:
+            await self.start()
+        generation = self.generation
+        started = time.monotonic()
+        saturated = self._pool.freesize == 0 and self._pool.size >= self.maxsize
+        try:
+            try:
+                conn = await self._pool.acquire()
+            except AttributeError:
+                # aiomysql trips over pooled connections whose _reader was reset
+                await self.rebuild(generation)
+                conn = await self._pool.acquire()
+        except Exception:
+            self.metrics.acquire_errors += 1
+            raise
+        pool = self._pool
+        wait_ms = (time.monotonic() - started) * 1000.0
+        if self.metrics.record_acquire(wait_ms, saturated):
+            logger.warning("db_pool_saturated %s", json.dumps({
+                "pool": self.name, "maxsize": self.maxsize, "wait_ms": round(wait_ms, 3),
+                "saturated_acquisitions": self.metrics.saturated_acquisitions,
+            }))
+        self.metrics.track(conn, pool)
+        try:
+            if self.validation == "ping":
+                await conn.ping(reconnect=True)
+            yield PooledConnection(conn)
+        finally:
+            await pool.release(conn)
+
+    def mark_write(self, client_key: Optional[str]) -> None:
+        """Pin `client_key` to the primary for the read-your-writes window."""
+        if self.replica is None or not client_key:
+            return
+        now = time.monotonic()
+        if len(self._recent_writers) > 1024:
+            self._recent_writers = {k: t for k, t in self._recent_writers.items() if t > now}
+        self._recent_writers[client_key] = now + self.read_your_writes_seconds
+
+    def _reads_from_replica(self, client_key: Optional[str]) -> bool:
+        if self.replica is None or self.replica.closed:
+            return False
+        if self._replica_down_until > time.monotonic():
+            return False
+        if client_key:
+            expires = self._recent_writers.get(client_key)
+            if expires is not None:
+                if expires > time.monotonic():
+                    return False
+                self._recent_writers.pop(client_key, None)
+        return True
+
+    @asynccontextmanager
+    async def read_connection(self, client_key: Optional[str] = None):
+        """Connection for read-only work.
+
+        Served by the replica when one is configured, except for clients that
+        wrote within the last read_your_writes_seconds, who stay on the primary
+        so they see their own saves despite replication lag. If the replica
+        checkout fails the read goes to the primary, and so do all reads for
+        the next replica_retry_seconds.
+        """
+        async with AsyncExitStack() as stack:
+            conn = None
+            if self._reads_from_replica(client_key):
+                try:
+                    conn = await stack.enter_async_context(self.replica.connection())
+                except Exception as e:
+                    self.replica_fallbacks += 1
+                    self._replica_down_until = time.monotonic() + self.replica_retry_seconds
+                    logger.warning("MySQL replica checkout failed, reading from primary: %s", e)
+            if conn is None:
+                conn = await stack.enter_async_context(self.connection())
+            yield conn
+
+    @asynccontextmanager
+    async def write_connection(self, client_key: Optional[str] = None):
+        """Primary connection that pins the client to the primary for reads."""
+        self.mark_write(client_key)
+        try:
+            async with self.connection() as conn:
+                yield conn
+        finally:
+            # Restart the window once the write has actually finished
+            self.mark_write(client_key)
+
+    @asynccontextmanager
+    async def lazy_connection(self, checkout=None):
+        """Yield a LazyConnection (default checkout: the primary) and release
+        it at the end if the handler has not already done so."""
+        handle = LazyConnection(checkout or self.connection)
+        try:
+            yield handle
+        finally:
+            await handle.release()
+
+    def release(self, conn) -> None:
+        if self._pool is not None:
+            self._pool.release(conn)
+
+    async def close(self) -> None:
+        for task in (self._liveness_task, self._stats_task):
+            if task is not None:
+                task.cancel()
+        self._liveness_task = self._stats_task = None
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.close()
+            await pool.wait_closed()
+            logger.info("MySQL connection pool closed.")
+        for task in list(self._retiring):
+            task.cancel()
+        if self.replica is not None:
+            await self.replica.close()
+
+
+def request_client_key(request) -> Optional[str]:
+    """Identify the caller for read-your-writes: X-Client-Id header, else peer address."""
+    key = request.headers.get("x-client-id")
+    if key:
+        return key
+    return request.client.host if request.client else None
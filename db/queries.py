@@ -0,0 +1,146 @@
+# db/queries.py - named statements for the hot, fixed queries
+"""Query registry.
+
+aiomysql only speaks MySQL's text protocol (there is no COM_STMT_PREPARE
+support), so true server-side prepared statements are not available. What
+we can do is declare each hot statement once: its SQL is normalized a
+single time at import (triple-quoted indentation collapsed so fewer bytes
+go over the wire), callers share one declaration instead of re-building
+strings, lookups that used to take several round trips are folded into one,
+and every statement counts its executions for /api/internal/stats.
+"""
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+import aiomysql
+
+
+class Query:
+    """A parameterized statement declared once and executed by reference."""
+
+    __slots__ = ("name", "sql", "dict_rows", "executions")
+
+    def __init__(self, name: str, sql: str, dict_rows: bool = False):
+        self.name = name
+        self.sql = re.sub(r"\s+", " ", sql).strip()
+        self.dict_rows = dict_rows
+        self.executions = 0
+
+
+QUERIES: Dict[str, Query] = {}
+
+
+def register(name: str, sql: str, dict_rows: bool = False) -> Query:
+    if name in QUERIES:
+        raise ValueError(f"Query {name!r} already registered")
+    query = QUERIES[name] = Query(name, sql, dict_rows)
+    return query
+
+
+async def _run(conn, query: Query, args: Sequence[Any]):
+    cur = await (conn.cursor(aiomysql.DictCursor) if query.dict_rows else conn.cursor())
+    query.executions += 1
+    await cur.execute(query.sql, tuple(args))
+    return cur
+
+
+async def fetch_one(conn, query: Query, args: Sequence[Any] = ()) -> Optional[Any]:
+    cur = await _run(conn, query, args)
+    try:
+        return await cur.fetchone()
+    finally:
+        await cur.close()
+
+
+async def fetch_all(conn, query: Query, args: Sequence[Any] = ()) -> List[Any]:
+    cur = await _run(conn, query, args)
+    try:
+        return list(await cur.fetchall())
+    finally:
+        await cur.close()
+
+
+async def execute(conn, query: Query, args: Sequence[Any] = ()) -> int:
+    cur = await _run(conn, query, args)
+    try:
+        return cur.rowcount
+    finally:
+        await cur.close()
+
+
+def stats() -> Dict[str, int]:
+    return {name: q.executions for name, q in QUERIES.items()}
+
+
+# --- Phrase library ---
+# Loaded once into models.phrase_library.PhraseIndex; never queried per request
+DESCRIPTOR_PHRASES_ALL = register(
+    "descriptor_phrases_all",
+    """
+    SELECT skive_category, subcategory, proficiency_tier, descriptor_phrase, narrative_type
+    FROM competency_descriptors
+    ORDER BY id
+    """,
+)
+
+# --- Profiles ---
+MATERIALIZED_RADAR = register(
+    "materialized_radar",
+    "SELECT radar FROM role_profile_archetypes WHERE profile_id = %s",
+    dict_rows=True,
+)
+
+# --- AI suggestion cache (backend.suggestion_cache) ---
+SUGGESTION_CACHE_GET = register(
+    "suggestion_cache_get",
+    """
+    SELECT payload, source FROM ai_suggestion_cache
+    WHERE cache_key = %s AND expires_at > NOW()
+    """,
+)
+
+SUGGESTION_CACHE_PUT = register(
+    "suggestion_cache_put",
+    """
+    INSERT INTO ai_suggestion_cache (cache_key, kind, payload, source, expires_at)
+    VALUES (%s, %s, %s, %s, DATE_ADD(NOW(), INTERVAL %s SECOND))
+    ON DUPLICATE KEY UPDATE payload=VALUES(payload), source=VALUES(source),
+        expires_at=VALUES(expires_at), created_at=CURRENT_TIMESTAMP
+    """,
+)
+
+SUGGESTION_CACHE_PURGE = register(
+    "suggestion_cache_purge",
+    "DELETE FROM ai_suggestion_cache WHERE expires_at <= NOW() LIMIT %s",
+)
+
+# --- Catalog ---
+# One round trip for all three id -> name lookups; ids that are NULL or
+# unknown come back as NULL.
+ROLE_CONTEXT_NAMES = register(
+    "role_context_names",
+    """
+    SELECT
+        (SELECT name FROM professions WHERE id = %s),
+        (SELECT name FROM departments WHERE id = %s),
+        (SELECT name FROM roles WHERE id = %s)
+    """,
+)
+
+PROFESSIONS_LIST = register(
+    "professions_list",
+    "SELECT id, name FROM professions ORDER BY id LIMIT 20",
+    dict_rows=True,
+)
+
+DEPARTMENTS_BY_PROFESSION = register(
+    "departments_by_profession",
+    "SELECT id, name, profession_id FROM departments WHERE profession_id = %s ORDER BY id",
+    dict_rows=True,
+)
+
+ROLES_BY_DEPARTMENT = register(
+    "roles_by_department",
+    "SELECT id, name, department_id FROM roles WHERE department_id = %s ORDER BY id",
+    dict_rows=True,
+)
@@ -0,0 +1,194 @@
+# db/schema.py - schema capabilities detected once instead of per request
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, FrozenSet, Optional, Tuple
+
+logger = logging.getLogger("prism.db")
+
+
+OBJECTIVES_SELECT_NEW = """
+    SELECT id, profile_id, skive_subcategory, objective_basic, objective_intermediate, objective_advanced, created_at, updated_at
+    FROM role_profile_objectives
+    WHERE profile_id=%s
+    ORDER BY skive_subcategory
+"""
+
+# Legacy schema: dimension, subcategory, objective
+OBJECTIVES_SELECT_LEGACY = """
+    SELECT id, profile_id, dimension, subcategory, objective, created_at, updated_at
+    FROM role_profile_objectives
+    WHERE profile_id=%s
+    ORDER BY dimension, subcategory
+"""
+
+
+def _objective_row_new(r: Dict) -> Dict:
+    return {
+        "id": r["id"],
+        "profile_id": r["profile_id"],
+        "dimension": "",
+        "subcategory": r["skive_subcategory"],
+        "basic": r["objective_basic"],
+        "intermediate": r["objective_intermediate"],
+        "advanced": r["objective_advanced"],
+        "created_at": r.get("created_at"),
+        "updated_at": r.get("updated_at"),
+    }
+
+
+def _objective_row_legacy(r: Dict) -> Dict:
+    return {
+        "id": r["id"],
+        "profile_id": r["profile_id"],
+        "dimension": r.get("dimension") or "",
+        "subcategory": r["subcategory"],
+        "objective": r["objective"],
+        "difficulty": "medium",  # not present in legacy; default
+        "created_at": r.get("created_at"),
+        "updated_at": r.get("updated_at"),
+    }
+
+
+class SchemaRegistry:
+    """Column sets and pre-built statements for tables whose shape drifts
+    between deployments (e.g. role_profiles.name vs profile_name,
+    skive_ratings.category vs dimension).
+
+    Populated from a single information_schema query at startup; call
+    `refresh()` again after a migration, or set a refresh interval.
+    """
+
+    TABLES = ("role_profiles", "skive_ratings", "role_profile_objectives")
+
+    # role_profiles columns save_config can fill, in insert order
+    ROLE_PROFILE_FIELDS = (
+        "name", "profile_name", "profession_id", "department_id", "role_id",
+        "skive", "day_to_day", "kras",
+    )
+
+    def __init__(self, pool_manager, db_name: Optional[str], refresh_interval: int = 0):
+        self.pool_manager = pool_manager
+        self.db_name = db_name
+        self.refresh_interval = refresh_interval
+        self.columns: Dict[str, FrozenSet[str]] = {}
+        self.loaded_at: Optional[float] = None
+        self.refreshes = 0
+        self.role_profile_columns: Tuple[str, ...] = ()
+        self.role_profile_insert_sql = ""
+        self.skive_category_col = "category"
+        self.skive_rating_insert_sql = ""
+        self.objectives_schema = "new"
+        self.objectives_select_sql = OBJECTIVES_SELECT_NEW
+        self.objectives_row_mapper: Callable[[Dict], Dict] = _objective_row_new
+        self._timer: Optional[asyncio.Task] = None
+        self._build_statements()
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    def has_column(self, table: str, column: str) -> bool:
+        return column in self.columns.get(table, ())
+
+    async def refresh(self, conn=None) -> None:
+        """Re-read column sets; uses `conn` if given, else a pooled connection."""
+        if conn is None:
+            async with self.pool_manager.connection() as pooled:
+                await self._load(pooled)
+        else:
+            await self._load(conn)
+        self._build_statements()
+        self.loaded_at = time.time()
+        self.refreshes += 1
+        logger.info(
+            "Schema capabilities loaded: %s",
+            {t: sorted(c) for t, c in self.columns.items()},
+        )
+
+    async def ensure_loaded(self, conn=None) -> None:
+        if not self.loaded:
+            await self.refresh(conn)
+
+    async def _load(self, conn) -> None:
+        placeholders = ",".join(["%s"] * len(self.TABLES))
+        cur = await conn.cursor()
+        try:
+            # Aliased because MySQL 8 returns information_schema labels upper-cased
+            await cur.execute(
+                f"""
+                SELECT table_name AS tbl, column_name AS col
+                FROM information_schema.columns
+                WHERE table_schema = %s AND table_name IN ({placeholders})
+                """,
+                (self.db_name, *self.TABLES),
+            )
+            rows = await cur.fetchall()
+        finally:
+            await cur.close()
+        found: Dict[str, set] = {t: set() for t in self.TABLES}
+        for tbl, col in rows:
+            found.setdefault(tbl, set()).add(col)
+        self.columns = {t: frozenset(c) for t, c in found.items()}
+
+    def _build_statements(self) -> None:
+        rp_cols = self.columns.get("role_profiles", frozenset())
+        # Foreign keys are always written; the rest only when the column exists
+        self.role_profile_columns = tuple(
+            c for c in self.ROLE_PROFILE_FIELDS
+            if c in rp_cols or c in ("profession_id", "department_id", "role_id")
+        )
+        placeholders = ",".join(["%s"] * len(self.role_profile_columns))
+        self.role_profile_insert_sql = (
+            f"INSERT INTO role_profiles ({', '.join(self.role_profile_columns)}) VALUES ({placeholders})"
+        )
+
+        sk_cols = self.columns.get("skive_ratings", frozenset())
+        self.skive_category_col = (
+            "category" if "category" in sk_cols else ("dimension" if "dimension" in sk_cols else "category")
+        )
+        self.skive_rating_insert_sql = f"""
+                INSERT INTO skive_ratings (profile_id, {self.skive_category_col}, subcategory, score, description)
+                VALUES (%s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE score=VALUES(score), description=VALUES(description)
+            """
+
+        # Objectives: per-level columns (new) or a single objective (legacy)
+        obj_cols = self.columns.get("role_profile_objectives", frozenset())
+        if obj_cols and "objective_basic" not in obj_cols and "objective" in obj_cols:
+            self.objectives_schema = "legacy"
+            self.objectives_select_sql = OBJECTIVES_SELECT_LEGACY
+            self.objectives_row_mapper = _objective_row_legacy
+        else:
+            self.objectives_schema = "new"
+            self.objectives_select_sql = OBJECTIVES_SELECT_NEW
+            self.objectives_row_mapper = _objective_row_new
+
+    def start_refresh_timer(self) -> None:
+        if self.refresh_interval > 0 and self._timer is None:
+            self._timer = asyncio.ensure_future(self._refresh_loop())
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Schema capability refresh failed: %s", e)
+
+    def stop(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def describe(self) -> Dict:
+        return {
+            "loaded_at": self.loaded_at,
+            "refreshes": self.refreshes,
+            "columns": {t: sorted(c) for t, c in self.columns.items()},
+            "role_profile_columns": list(self.role_profile_columns),
+            "skive_category_col": self.skive_category_col,
+            "objectives_schema": self.objectives_schema,
+        }
@@ -2,16 +2,26 @@
 # ==================================================
 
 import os
+import re
+import sys
 import logging
 import asyncio
 from typing import Dict, List, Optional
 import aiomysql
 import google.generativeai as genai
-from fastapi import Depends, FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
-from backend.archetype_logic import generate_archetype_narrative
+from backend.archetype_logic import NARRATIVE_CACHE, generate_archetype_narrative
+from backend.cache import LRUCache, VersionTable
+from backend.gemini import GeminiClient
+from backend.suggestion_cache import SuggestionCache
+from backend.ratings import Rating, canonical_ratings, group_ratings, ratings_fingerprint
+from db.pool import PoolManager, request_client_key
+from db.schema import SchemaRegistry
+from db import queries
 
 # ---------------------------
 # Data model for requests
@@ -67,29 +77,25 @@ app = FastAPI()
 # Store shared state for routers immediately after app creation
 app.state.gemini_model = _model
 app.state.disable_ai = DISABLE_AI
-
-# --- MySQL Pool Startup/Shutdown ---
-@app.on_event("startup")
-async def startup_event():
-    app.state.mysql_pool = await aiomysql.create_pool(
-        host=os.getenv("DB_HOST", "localhost"),
-        port=int(os.getenv("DB_PORT", "3306")),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-        db=os.getenv("DB_NAME"),
-        minsize=1,
-        maxsize=10,
-        pool_recycle=280,
-        autocommit=True,
-    )
-    logging.info("MySQL connection pool created.")
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    pool = app.state.mysql_pool
-    pool.close()
-    await pool.wait_closed()
-    logging.info("MySQL connection pool closed.")
+# All AI calls (here and in routes/ai_async.py) go through this one client
+GEMINI = GeminiClient(_model, DISABLE_AI)
+app.state.gemini = GEMINI
+
+# --- MySQL Pool ---
+# One pool for the whole process; routers reach it through app.state.db_pool.
+DB_POOL = PoolManager.from_env()
+app.state.db_pool = DB_POOL
+# Schema drift (column names differing across deployments) is detected once
+# at startup instead of on every save.
+SCHEMA = SchemaRegistry(
+    DB_POOL,
+    os.getenv("DB_NAME"),
+    refresh_interval=int(os.getenv("DB_SCHEMA_REFRESH_SECONDS", "0") or 0),
+)
+app.state.schema = SCHEMA
+# Generated suggestions, shared with routes/ai_async.py
+SUGGESTIONS = SuggestionCache.from_env(DB_POOL)
+app.state.suggestion_cache = SUGGESTIONS
 
 # Only now import and include routers
 from routes import ai_async, meta_async
@@ -154,25 +160,6 @@ def call_gemini_with_logging(model, prompt):
 # ---------------------------
 # (Removed demo ai_test endpoint and duplicate app definition)
 
-# --- DATABASE HELPER ---
-DB_POOL = None
-
-async def create_db_pool():
-    """Create a new aiomysql pool using env vars."""
-    global DB_POOL
-    DB_POOL = await aiomysql.create_pool(
-        host=os.getenv("DB_HOST", "localhost"),
-        port=int(os.getenv("DB_PORT", "3306")),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-        db=os.getenv("DB_NAME"),
-        autocommit=True,
-        minsize=1,
-        maxsize=5,
-        pool_recycle=280,  # Recycle connections before MySQL wait_timeout
-    )
-    logging.info("MySQL connection pool created.")
-
 # (Removed duplicate app, CORS, and router includes — these already exist earlier)
 
 @app.post("/api/archetype")
@@ -180,68 +167,138 @@ async def archetype_endpoint(payload: ArchetypeRequest):
     result = generate_archetype_narrative(payload.skive)
     return {"archetype": result}
 
+ARCHETYPE_BATCH_YIELD_EVERY = 100
+
+def _archetype_batch_items(body: bytes, content_type: str) -> List:
+    """Split a batch body into items: a JSON array, or NDJSON with one body
+    per line. NDJSON lines that fail to decode or parse become per-item
+    errors; a JSON array that does either fails the whole request with 400."""
+    if "ndjson" not in content_type and body.lstrip().startswith(b"["):
+        try:
+            items = json.loads(body.decode("utf-8"))
+        except UnicodeDecodeError as e:
+            raise HTTPException(status_code=400, detail=f"Body is not valid UTF-8: {e}")
+        except json.JSONDecodeError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON array: {e}")
+        if not isinstance(items, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON array")
+        return items
+    items = []
+    for line in body.splitlines():
+        if not line.strip():
+            continue
+        try:
+            items.append(json.loads(line.decode("utf-8")))
+        except UnicodeDecodeError as e:
+            items.append(ValueError(f"Line is not valid UTF-8: {e}"))
+        except json.JSONDecodeError as e:
+            items.append(ValueError(f"Invalid JSON line: {e}"))
+    return items
+
+@app.post("/api/archetype/batch")
+async def archetype_batch_endpoint(request: Request):
+    """Archetype narratives for many `ArchetypeRequest` bodies in one call.
+
+    Accepts a JSON array or NDJSON and streams NDJSON back in input order,
+    one `{"index", "profile_id", "archetype"}` line per item, or
+    `{"index", "error"}` for an item that is invalid; a bad item never fails
+    the batch.
+    """
+    items = _archetype_batch_items(await request.body(), request.headers.get("content-type", ""))
+
+    async def results():
+        for index, item in enumerate(items):
+            try:
+                if isinstance(item, Exception):
+                    raise item
+                if not isinstance(item, dict):
+                    raise ValueError("Item must be a JSON object")
+                payload = ArchetypeRequest(**item)
+                line = {
+                    "index": index,
+                    "profile_id": payload.profile_id,
+                    "archetype": generate_archetype_narrative(payload.skive),
+                }
+            except (ValueError, TypeError) as e:
+                line = {"index": index, "error": str(e)}
+            yield json.dumps(line) + "\n"
+            # Let other requests run during very large batches
+            if index % ARCHETYPE_BATCH_YIELD_EVERY == ARCHETYPE_BATCH_YIELD_EVERY - 1:
+                await asyncio.sleep(0)
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
 
 @app.get("/api/health")
 async def health():
     return {"status": "ok"}
 
+@app.get("/api/internal/stats")
+async def internal_stats():
+    """Operational counters for sizing and tuning; not part of the public API."""
+    return {
+        "db_pool": DB_POOL.stats(),
+        "queries": queries.stats(),
+        "multi_radar_cache": MULTI_RADAR_CACHE.stats(),
+        "profile_versions": _PROFILE_VERSIONS.stats(),
+        "archetype_cache": ARCHETYPE_CACHE.stats(),
+        "narrative_cache": NARRATIVE_CACHE.stats(),
+        "phrases": PHRASES.stats(),
+        "ai_suggestion_cache": SUGGESTIONS.stats(),
+        "gemini": GEMINI.stats(),
+    }
+
+@app.post("/api/internal/schema/refresh")
+async def refresh_schema():
+    """Re-detect schema capabilities, e.g. right after running a migration."""
+    await SCHEMA.refresh()
+    return SCHEMA.describe()
+
 @app.on_event("startup")
 async def on_startup():
     try:
-        await create_db_pool()
+        await DB_POOL.start()
         await init_db()
+        await _load_phrase_index()
     except Exception as e:
         logging.exception("Failed to create MySQL pool: %s", e)
         raise
+    try:
+        await SCHEMA.refresh()
+    except Exception as e:
+        # save_config loads it on first use instead
+        logging.warning("Schema capability detection failed at startup: %s", e)
+    SCHEMA.start_refresh_timer()
+    SUGGESTIONS.start_purge_timer()
 
 @app.on_event("shutdown")
 async def shutdown():
-    if DB_POOL:
-        DB_POOL.close()
-        await DB_POOL.wait_closed()
-        logging.info("Database connection pool closed.")
+    SCHEMA.stop()
+    SUGGESTIONS.stop()
+    await DB_POOL.close()
 
 async def get_db_connection():
-    """Yield a live connection, recreating the pool if needed."""
-    global DB_POOL
-    if DB_POOL is None or getattr(DB_POOL, "_closed", False):
-        await create_db_pool()
-    try:
-        async with DB_POOL.acquire() as conn:
-            # Lightweight ping to ensure the connection is alive
-            try:
-                cur = await conn.cursor()
-                await cur.execute("SELECT 1")
-                await cur.fetchone()
-                await cur.close()
-            except Exception:
-                # Connection might be stale; recreate pool and reacquire
-                try:
-                    DB_POOL.close()
-                    await DB_POOL.wait_closed()
-                except Exception:
-                    pass
-                await create_db_pool()
-                async with DB_POOL.acquire() as conn2:
-                    yield conn2
-                    return
-            yield conn
-    except AttributeError:
-        # Handle pool's internal broken connections (e.g., _reader None). Recreate pool.
-        try:
-            if DB_POOL is not None:
-                DB_POOL.close()
-                await DB_POOL.wait_closed()
-        except Exception:
-            pass
-        await create_db_pool()
-        async with DB_POOL.acquire() as conn:
-            yield conn
+    """Yield a lazy primary connection: nothing is checked out until the first
+    query, and handlers may `await conn.release()` as soon as their DB work is done."""
+    async with DB_POOL.lazy_connection() as conn:
+        yield conn
+
+async def get_read_connection(request: Request):
+    """Read-only endpoints: replica when configured, primary right after this client saved."""
+    client = request_client_key(request)
+    async with DB_POOL.lazy_connection(lambda: DB_POOL.read_connection(client)) as conn:
+        yield conn
+
+async def get_write_connection(request: Request):
+    """Primary connection for saves; starts this client's read-your-writes window."""
+    client = request_client_key(request)
+    async with DB_POOL.lazy_connection(lambda: DB_POOL.write_connection(client)) as conn:
+        yield conn
 
 # Database initialization
 async def init_db():
     """Initialize database tables"""
-    conn = await get_db_connection().__anext__()
+    conn = await DB_POOL.acquire()
     cursor = await conn.cursor()
     try:
         # Create basic tables
@@ -325,6 +382,21 @@ async def init_db():
             )
         """)
         
+        # Archetype/radar view materialized by save_config (read far more than written).
+        # Rows keep the phrases current when computed; rerun
+        # `backfill-archetypes --all` after editing competency_descriptors.
+        await cursor.execute("""
+            CREATE TABLE IF NOT EXISTS role_profile_archetypes (
+                profile_id INT PRIMARY KEY,
+                archetype_label VARCHAR(255),
+                radar JSON NOT NULL,
+                computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                FOREIGN KEY (profile_id) REFERENCES role_profiles(id)
+            )
+        """)
+
+        await cursor.execute(SuggestionCache.CREATE_TABLE)
+
         # Seed data
         await _seed_professions_departments_roles(conn)
         await _seed_competency_descriptors(conn)
@@ -337,7 +409,7 @@ async def init_db():
         raise
     finally:
         await cursor.close()
-        await conn.ensure_closed()
+        DB_POOL.release(conn)
 
 # Seed functions
 async def _seed_professions_departments_roles(conn):
@@ -419,7 +491,7 @@ async def _seed_professions_departments_roles(conn):
 
 from models.phrase_library import (
     COMPETENCY_DESCRIPTORS_SEED_DATA,
-    get_proficiency_tier,
+    PHRASES,
     get_narrative_type
 )
 
@@ -438,24 +510,49 @@ async def _seed_competency_descriptors(conn):
         await cursor.close()
 
 # Dynamic archetype generation functions
-def identify_signature_competencies(ratings: List[Dict], top_n: int = 3) -> List[Dict]:
+def identify_signature_competencies(ratings: List[Rating], top_n: int = 3) -> List[Rating]:
     """Identify the top N highest-rated competencies as signature skills"""
-    sorted_ratings = sorted(ratings, key=lambda x: float(x.get('score', 0)), reverse=True)
+    sorted_ratings = sorted(ratings, key=lambda r: r.score, reverse=True)
     return sorted_ratings[:top_n]
 
-def categorize_by_proficiency_tier(ratings: List[Dict]) -> Dict[str, List[Dict]]:
+def categorize_by_proficiency_tier(ratings: List[Rating]) -> Dict[str, List[Rating]]:
     """Categorize ratings by proficiency tier (low/medium/high)"""
-    tiers = {'low': [], 'medium': [], 'high': []}
-    for rating in ratings:
-        score = float(rating.get('score', 0))
-        tier = get_proficiency_tier(score)
-        tiers[tier].append({**rating, 'tier': tier})
-    return tiers
-
-async def generate_dynamic_archetype(ratings: List[Dict], skive_category: str, conn) -> Dict:
-    """Generate dynamic archetype for a specific SKIVE category"""
+    return group_ratings(ratings).by_tier
 
-    
+async def _load_phrase_index():
+    """Replace the in-memory phrase index (models.phrase_library.PHRASES)
+    with the table's current contents."""
+    try:
+        async with DB_POOL.connection() as conn:
+            rows = await queries.fetch_all(conn, queries.DESCRIPTOR_PHRASES_ALL)
+    except Exception as e:
+        logging.warning("Loading competency descriptors failed, using seed data: %s", e)
+        return
+    if rows:
+        PHRASES.replace(rows)
+    logging.info("Phrase index loaded with %d descriptors.", len(PHRASES))
+
+# Archetypes depend only on the rating set (and the phrase library), so they
+# are memoized by the ratings' canonical fingerprint and shared by every
+# profile with the same ratings. Results are shared: treat them as read-only.
+# Spelling variants of a subcategory share an entry, which lists competencies
+# as spelled by the profile that computed it.
+ARCHETYPE_CACHE = LRUCache(
+    maxsize=int(os.getenv("ARCHETYPE_CACHE_SIZE", "1024")),
+    name="archetype",
+)
+
+def generate_dynamic_archetype(ratings: List[Rating], skive_category: str) -> Dict:
+    """Generate dynamic archetype for a specific SKIVE category"""
+    fingerprint = ratings_fingerprint(ratings)
+    key = ('dynamic', str(skive_category).lower(), PHRASES.version, fingerprint)
+    result = ARCHETYPE_CACHE.get(key)
+    if result is None:
+        result = _build_dynamic_archetype(canonical_ratings(ratings), skive_category)
+        ARCHETYPE_CACHE.set(key, result)
+    return result
+
+def _build_dynamic_archetype(ratings: List[Rating], skive_category: str) -> Dict:
     if not ratings:
         return {'narrative': f'No {skive_category} data available', 'signature_competencies': [], 'supporting_competencies': [], 'foundational_competencies': []}
     
@@ -465,24 +562,16 @@ async def generate_dynamic_archetype(ratings: List[Dict], skive_category: str, c
     # Categorize by proficiency tier
     tiers = categorize_by_proficiency_tier(ratings)
     
-    # Get descriptor phrases from database
+    # Get descriptor phrases from the in-memory phrase index
     narrative_parts = []
     
     # Build signature narrative
     if signature_comps:
         signature_phrases = []
         for comp in signature_comps:
-            cursor = await conn.cursor(aiomysql.DictCursor)
-            await cursor.execute(
-                """SELECT descriptor_phrase FROM competency_descriptors 
-                   WHERE skive_category = %s AND subcategory = %s AND proficiency_tier = %s AND narrative_type = 'signature'""",
-                (skive_category, comp.get('subcategory', ''), get_proficiency_tier(float(comp.get('score', 0))))
-            )
-            result = await cursor.fetchone()
-            await cursor.close()
-            
-            if result:
-                signature_phrases.append(result['descriptor_phrase'])
+            phrase = PHRASES.get(skive_category, comp.key, comp.tier, 'signature')
+            if phrase:
+                signature_phrases.append(phrase)
         
         if signature_phrases:
             narrative_parts.append(f"This role is defined by mastery of {', '.join(signature_phrases)}.")
@@ -491,17 +580,9 @@ async def generate_dynamic_archetype(ratings: List[Dict], skive_category: str, c
     high_tier_phrases = []
     for comp in tiers['high']:
         if comp not in signature_comps:  # Avoid duplicating signature competencies
-            cursor = await conn.cursor(aiomysql.DictCursor)
-            await cursor.execute(
-                """SELECT descriptor_phrase FROM competency_descriptors 
-                   WHERE skive_category = %s AND subcategory = %s AND proficiency_tier = 'high' AND narrative_type = 'supporting'""",
-                (skive_category, comp.get('subcategory', ''))
-            )
-            result = await cursor.fetchone()
-            await cursor.close()
-            
-            if result:
-                high_tier_phrases.append(result['descriptor_phrase'])
+            phrase = PHRASES.get(skive_category, comp.key, 'high', 'supporting')
+            if phrase:
+                high_tier_phrases.append(phrase)
     
     if high_tier_phrases:
         narrative_parts.append(f"Supported by {', '.join(high_tier_phrases)}.")
@@ -509,26 +590,18 @@ async def generate_dynamic_archetype(ratings: List[Dict], skive_category: str, c
     # Build foundational narrative for medium-tier competencies
     medium_tier_phrases = []
     for comp in tiers['medium'][:3]:  # Limit to top 3 medium competencies
-        cursor = await conn.cursor(aiomysql.DictCursor)
-        await cursor.execute(
-            """SELECT descriptor_phrase FROM competency_descriptors 
-               WHERE skive_category = %s AND subcategory = %s AND proficiency_tier = 'medium' AND narrative_type = 'foundational'""",
-            (skive_category, comp.get('subcategory', ''))
-        )
-        result = await cursor.fetchone()
-        await cursor.close()
-        
-        if result:
-            medium_tier_phrases.append(result['descriptor_phrase'])
+        phrase = PHRASES.get(skive_category, comp.key, 'medium', 'foundational')
+        if phrase:
+            medium_tier_phrases.append(phrase)
     
     if medium_tier_phrases:
         narrative_parts.append(f"Built upon a foundation of {', '.join(medium_tier_phrases)}.")
     
     return {
         'narrative': ' '.join(narrative_parts) if narrative_parts else f'Professional competence in {skive_category} with balanced skill distribution.',
-        'signature_competencies': [comp.get('subcategory', '') for comp in signature_comps],
-        'supporting_competencies': [comp.get('subcategory', '') for comp in tiers['high'] if comp not in signature_comps],
-        'foundational_competencies': [comp.get('subcategory', '') for comp in tiers['medium'][:3]]
+        'signature_competencies': [comp.subcategory for comp in signature_comps],
+        'supporting_competencies': [comp.subcategory for comp in tiers['high'] if comp not in signature_comps],
+        'foundational_competencies': [comp.subcategory for comp in tiers['medium'][:3]]
     }
 
 # API Endpoints
@@ -590,18 +663,8 @@ async def debug_skive_schema(conn = Depends(get_db_connection)):
 @app.get("/api/debug/skive_rows/{profile_id}")
 async def debug_skive_rows(profile_id: int, conn = Depends(get_db_connection)):
     try:
-        db_name = os.getenv("DB_NAME")
-        cur = await conn.cursor(aiomysql.DictCursor)
-        await cur.execute(
-            """
-            SELECT column_name FROM information_schema.columns 
-            WHERE table_schema = %s AND table_name = 'skive_ratings'
-            """,
-            (db_name,)
-        )
-        cols = {row['column_name'] for row in (await cur.fetchall())}
-        await cur.close()
-        category_col = 'category' if 'category' in cols else ('dimension' if 'dimension' in cols else 'category')
+        await SCHEMA.ensure_loaded(conn)
+        category_col = SCHEMA.skive_category_col
         cursor = await conn.cursor(aiomysql.DictCursor)
         await cursor.execute(f"SELECT id, {category_col} AS category, subcategory, score, description FROM skive_ratings WHERE profile_id=%s ORDER BY id DESC LIMIT 50", (profile_id,))
         rows = await cursor.fetchall()
@@ -620,10 +683,11 @@ async def debug_skive_rows(profile_id: int, conn = Depends(get_db_connection)):
 
 # --- SIMULATIONS (Dashboard) ---
 @app.get("/api/simulations")
-async def list_simulations(conn = Depends(get_db_connection)):
+async def list_simulations(conn = Depends(get_read_connection)):
     """Return a simple list of saved profiles for the dashboard.
-    Uses `role_profiles` joined to get readable names. `updated_at` and `archetype`
-    may be NULL depending on schema; the frontend tolerates missing values.
+    Uses `role_profiles` joined to get readable names. `archetype` is the label
+    materialized at save time and is NULL for profiles not yet backfilled;
+    `updated_at` is always NULL. The frontend tolerates missing values.
     """
     cursor = await conn.cursor(aiomysql.DictCursor)
     try:
@@ -635,8 +699,9 @@ async def list_simulations(conn = Depends(get_db_connection)):
                 p.name AS profession,
                 d.name AS department,
                 NULL AS updated_at,
-                NULL AS archetype
+                a.archetype_label AS archetype
             FROM role_profiles rp
+            LEFT JOIN role_profile_archetypes a ON a.profile_id = rp.id
             LEFT JOIN roles r ON rp.role_id = r.id
             LEFT JOIN departments d ON rp.department_id = d.id
             LEFT JOIN professions p ON rp.profession_id = p.id
@@ -649,7 +714,7 @@ async def list_simulations(conn = Depends(get_db_connection)):
         await cursor.close()
 
 @app.get("/api/simulations/{profile_id}")
-async def get_simulation(profile_id: int, conn = Depends(get_db_connection)):
+async def get_simulation(profile_id: int, conn = Depends(get_read_connection)):
     """Return a saved profile payload by id. This is intentionally lightweight and
     returns the main identity columns plus names for display. The UI merges this
     with its initial template.
@@ -697,52 +762,24 @@ class SaveConfigPayload(BaseModel):
     kras: Optional[List[str]] = []
 
 @app.post("/api/config/save")
-async def save_config(payload: SaveConfigPayload, conn = Depends(get_db_connection)):
+async def save_config(payload: SaveConfigPayload, conn = Depends(get_write_connection)):
     """Persist a role profile and normalized SKIVE ratings."""
     try:
+        await SCHEMA.ensure_loaded(conn)
         cursor = await conn.cursor()
-        # Detect role_profiles columns to handle schema drift
-        db_name = os.getenv("DB_NAME")
-        col_cursor = await conn.cursor(aiomysql.DictCursor)
-        await col_cursor.execute(
-            """
-            SELECT column_name FROM information_schema.columns 
-            WHERE table_schema = %s AND table_name = 'role_profiles'
-            """,
-            (db_name,)
-        )
-        cols = {row['column_name'] for row in (await col_cursor.fetchall())}
-        await col_cursor.close()
-
-        column_names = []
-        values = []
-
-        # Name columns
-        if 'name' in cols:
-            column_names.append('name')
-            values.append(payload.name)
-        if 'profile_name' in cols:
-            column_names.append('profile_name')
-            values.append(payload.name)
-
-        # Foreign keys
-        column_names += ['profession_id', 'department_id', 'role_id']
-        values += [payload.profession, payload.department, payload.role]
-
-        # JSON fields if present and/or NOT NULL in some schemas
-        if 'skive' in cols:
-            column_names.append('skive')
-            values.append(json.dumps(payload.skive or {}))
-        if 'day_to_day' in cols:
-            column_names.append('day_to_day')
-            values.append(json.dumps(payload.day_to_day or []))
-        if 'kras' in cols:
-            column_names.append('kras')
-            values.append(json.dumps(payload.kras or []))
-
-        placeholders = ','.join(['%s'] * len(values))
-        col_list = ', '.join(column_names)
-        sql = f"INSERT INTO role_profiles ({col_list}) VALUES ({placeholders})"
+        # Column set was detected at startup (handles name/profile_name drift)
+        field_values = {
+            'name': payload.name,
+            'profile_name': payload.name,
+            'profession_id': payload.profession,
+            'department_id': payload.department,
+            'role_id': payload.role,
+            'skive': json.dumps(payload.skive or {}),
+            'day_to_day': json.dumps(payload.day_to_day or []),
+            'kras': json.dumps(payload.kras or []),
+        }
+        values = [field_values[c] for c in SCHEMA.role_profile_columns]
+        sql = SCHEMA.role_profile_insert_sql
         try:
             await cursor.execute(sql, tuple(values))
         except Exception as e:
@@ -754,27 +791,28 @@ async def save_config(payload: SaveConfigPayload, conn = Depends(get_db_connecti
         # Insert SKIVE ratings into normalized table (flatten nested objects and accept numeric leaves)
         ratings_inserted = 0
 
-        # Detect skive_ratings category column name
-        skive_cols_cur = await conn.cursor(aiomysql.DictCursor)
-        await skive_cols_cur.execute(
-            """
-            SELECT column_name FROM information_schema.columns
-            WHERE table_schema = %s AND table_name = 'skive_ratings'
-            """,
-            (db_name,)
-        )
-        skive_cols = {row['column_name'] for row in (await skive_cols_cur.fetchall())}
-        await skive_cols_cur.close()
-        category_col = 'category' if 'category' in skive_cols else ('dimension' if 'dimension' in skive_cols else 'category')
-
         for category, subs in (payload.skive or {}).items():
             if not isinstance(subs, dict):
                 logging.warning(f"Skipping category {category}: not a dict")
                 continue
-            async for _ in _async_insert_leaves(cursor, profile_id, category, subs, category_col):
+            async for _ in _async_insert_leaves(cursor, profile_id, category, subs, SCHEMA.skive_rating_insert_sql):
                 ratings_inserted += 1
 
+        # Materialize the archetype/radar view now so reads don't recompute it
+        radar = None
+        try:
+            radar_ratings = _ratings_from_skive_json(payload.skive or {})
+            if radar_ratings:
+                radar = compute_multi_radar(radar_ratings)
+                await _store_materialized_radar(cursor, profile_id, radar)
+        except Exception as e:
+            radar = None
+            logging.warning(f"Archetype materialization failed for profile {profile_id}: {e}")
+
         await conn.commit()
+        invalidate_profile(profile_id)
+        if radar is not None:
+            MULTI_RADAR_CACHE.set((profile_id, _profile_version(profile_id)), radar)
         return {"status": "ok", "profile_id": profile_id, "ratings_inserted": ratings_inserted}
     except Exception as e:
         await conn.rollback()
@@ -807,16 +845,11 @@ def _iter_leaf_entries(prefix_cat: str, obj: dict, parent_key: Optional[str] = N
                     for sub_name, score, desc in _iter_leaf_entries(prefix_cat, v, parent_key=k):
                         yield sub_name, score, desc
 
-async def _async_insert_leaves(cursor, profile_id: int, category: str, subs: dict, category_col: str = 'category'):
-    """Async generator to insert leaves and yield once per successful insert."""
+async def _async_insert_leaves(cursor, profile_id: int, category: str, subs: dict, sql: str):
+    """Async generator to insert leaves and yield once per successful insert.
+    `sql` is the registry's pre-built skive_ratings upsert for this schema."""
     for sub_name, score, desc in _iter_leaf_entries(category, subs):
         try:
-            # Build SQL with detected category column
-            sql = f"""
-                INSERT INTO skive_ratings (profile_id, {category_col}, subcategory, score, description)
-                VALUES (%s, %s, %s, %s, %s)
-                ON DUPLICATE KEY UPDATE score=VALUES(score), description=VALUES(description)
-            """
             await cursor.execute(
                 sql,
                 (profile_id, category.lower(), sub_name, score, desc)
@@ -838,69 +871,24 @@ class ObjectivesSavePayload(BaseModel):
     items: List[ObjectiveItem]
 
 @app.get("/api/objectives")
-async def get_objectives(profile_id: int, conn = Depends(get_db_connection)):
+async def get_objectives(profile_id: int, conn = Depends(get_read_connection)):
     try:
+        # Query and row shape were bound to the detected schema version at startup
+        await SCHEMA.ensure_loaded(conn)
         cursor = await conn.cursor(aiomysql.DictCursor)
         try:
-            # Newer schema
-            await cursor.execute(
-                """
-                SELECT id, profile_id, skive_subcategory, objective_basic, objective_intermediate, objective_advanced, created_at, updated_at
-                FROM role_profile_objectives
-                WHERE profile_id=%s
-                ORDER BY skive_subcategory
-                """,
-                (profile_id,)
-            )
-            rows = await cursor.fetchall()
-            await cursor.close()
-            return [
-                {
-                    "id": r["id"],
-                    "profile_id": r["profile_id"],
-                    "dimension": "",
-                    "subcategory": r["skive_subcategory"],
-                    "basic": r["objective_basic"],
-                    "intermediate": r["objective_intermediate"],
-                    "advanced": r["objective_advanced"],
-                    "created_at": r.get("created_at"),
-                    "updated_at": r.get("updated_at"),
-                }
-                for r in rows
-            ]
-        except Exception as e_new:
-            logging.info(f"Falling back to legacy objectives schema due to: {e_new}")
-            # Legacy schema: dimension, subcategory, objective
-            await cursor.execute(
-                """
-                SELECT id, profile_id, dimension, subcategory, objective, created_at, updated_at
-                FROM role_profile_objectives
-                WHERE profile_id=%s
-                ORDER BY dimension, subcategory
-                """,
-                (profile_id,)
-            )
+            await cursor.execute(SCHEMA.objectives_select_sql, (profile_id,))
             rows = await cursor.fetchall()
+        finally:
             await cursor.close()
-            return [
-                {
-                    "id": r["id"],
-                    "profile_id": r["profile_id"],
-                    "dimension": r.get("dimension") or "",
-                    "subcategory": r["subcategory"],
-                    "objective": r["objective"],
-                    "difficulty": "medium",  # not present in legacy; default
-                    "created_at": r.get("created_at"),
-                    "updated_at": r.get("updated_at"),
-                }
-                for r in rows
-            ]
+        mapper = SCHEMA.objectives_row_mapper
+        return [mapper(r) for r in rows]
     except Exception as e:
         logging.error(f"Error fetching objectives: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch objectives")
 
 @app.post("/api/objectives/save")
-async def save_objectives(payload: ObjectivesSavePayload, conn = Depends(get_db_connection)):
+async def save_objectives(payload: ObjectivesSavePayload, conn = Depends(get_write_connection)):
     try:
         cursor = await conn.cursor()
         count = 0
@@ -940,7 +928,7 @@ class GenerateObjectiveRequest(BaseModel):
     difficulty: Optional[str] = "medium"
 
 @app.post("/api/objectives/generate")
-async def generate_objective(req: GenerateObjectiveRequest, conn = Depends(get_db_connection)):
+async def generate_objective(req: GenerateObjectiveRequest):
     """Generate a single objective text for a given SKIVE subcategory and difficulty."""
     # Normalize fields from either casing
     profile_id = req.profile_id or req.profileId
@@ -974,22 +962,14 @@ class ObjectiveResponse(BaseModel):
 
 async def _resolve_role_context(conn, key: RoleKey) -> Dict[str, str]:
     ctx = {"profession": "", "department": "", "role": ""}
-    cur = await conn.cursor()
-    try:
-        if key.profession:
-            await cur.execute("SELECT name FROM professions WHERE id=%s", (key.profession,))
-            row = await cur.fetchone()
-            ctx["profession"] = row[0] if row else ""
-        if key.department:
-            await cur.execute("SELECT name FROM departments WHERE id=%s", (key.department,))
-            row = await cur.fetchone()
-            ctx["department"] = row[0] if row else ""
-        if key.role:
-            await cur.execute("SELECT name FROM roles WHERE id=%s", (key.role,))
-            row = await cur.fetchone()
-            ctx["role"] = row[0] if row else ""
-    finally:
-        await cur.close()
+    if not (key.profession or key.department or key.role):
+        return ctx
+    row = await queries.fetch_one(
+        conn, queries.ROLE_CONTEXT_NAMES,
+        (key.profession or None, key.department or None, key.role or None),
+    )
+    if row:
+        ctx["profession"], ctx["department"], ctx["role"] = (v or "" for v in row)
     return ctx
 
 def _tokens(*parts: str) -> List[str]:
@@ -1097,7 +1077,9 @@ async def get_day_to_day_suggestions(role_id: int, conn = Depends(get_db_connect
                 WHERE r.id = %s
             """, (role_id,))
             result = await cur.fetchone()
-            
+        # Role context is all we need from MySQL; hand the connection back before Gemini
+        await conn.release()
+
         if not result:
             raise ValueError(f"Role {role_id} not found")
             
@@ -1126,14 +1108,17 @@ async def get_day_to_day_suggestions(role_id: int, conn = Depends(get_db_connect
             return base
 
         # Use Gemini AI if available, otherwise fallback to deterministic
-        if API_KEY and not DISABLE_AI:
+        if GEMINI.enabled:
             try:
                 prompt = (
                     "Generate day-to-day tasks for the role below. Return STRICT JSON with key 'items' as an array of 8 strings.\n"
                     f"Profession: {profession}\nDepartment: {department}\nRole: {role}\n"
                 )
-                model = genai.GenerativeModel("gemini-1.5-flash")
-                resp = await asyncio.to_thread(model.generate_content, prompt)
+                cache_key = SUGGESTIONS.key("suggestions.day_to_day", prompt)
+                cached = await SUGGESTIONS.get(cache_key)
+                if cached is not None:
+                    return cached
+                resp = await GEMINI.generate(prompt)
                 text = resp.text if hasattr(resp, "text") else str(resp)
                 # naive JSON extract
                 try:
@@ -1141,8 +1126,13 @@ async def get_day_to_day_suggestions(role_id: int, conn = Depends(get_db_connect
                     items_raw = data.get("items", [])
                 except Exception:
                     items_raw = []
-                items = _postprocess(items_raw, toks, 8, deterministic_items())
-                return {"suggestions": items}
+                items = _postprocess(items_raw, toks, 8, [])
+                if len(items) < 8:
+                    # Not enough usable model output: top up from the template, never cache that
+                    return {"suggestions": _postprocess(items_raw, toks, 8, deterministic_items())}
+                result = {"suggestions": items}
+                await SUGGESTIONS.set(cache_key, "suggestions.day_to_day", result)
+                return result
             except Exception as e:
                 logging.warning("Gemini day_to_day failed, using deterministic: %s", e)
                 return {"suggestions": deterministic_items()}
@@ -1178,7 +1168,9 @@ async def get_kras_suggestions(role_id: int, conn = Depends(get_db_connection)):
                 WHERE r.id = %s
             """, (role_id,))
             result = await cur.fetchone()
-            
+        # Role context is all we need from MySQL; hand the connection back before Gemini
+        await conn.release()
+
         if not result:
             raise ValueError(f"Role {role_id} not found")
             
@@ -1208,14 +1200,17 @@ async def get_kras_suggestions(role_id: int, conn = Depends(get_db_connection)):
             return base
 
         # Use Gemini AI if available, otherwise fallback to deterministic
-        if API_KEY and not DISABLE_AI:
+        if GEMINI.enabled:
             try:
                 prompt = (
                     "Generate KRAs (Key Result Areas) for the role below. Return STRICT JSON with key 'items' as an array of 8 strings.\n"
                     f"Profession: {profession}\nDepartment: {department}\nRole: {role}\n"
                 )
-                model = genai.GenerativeModel("gemini-1.5-flash")
-                resp = await asyncio.to_thread(model.generate_content, prompt)
+                cache_key = SUGGESTIONS.key("suggestions.kras", prompt)
+                cached = await SUGGESTIONS.get(cache_key)
+                if cached is not None:
+                    return cached
+                resp = await GEMINI.generate(prompt)
                 text = resp.text if hasattr(resp, "text") else str(resp)
                 # naive JSON extract
                 try:
@@ -1223,8 +1218,13 @@ async def get_kras_suggestions(role_id: int, conn = Depends(get_db_connection)):
                     items_raw = data.get("items", [])
                 except Exception:
                     items_raw = []
-                items = _postprocess(items_raw, toks, 8, deterministic_kras())
-                return {"suggestions": items}
+                items = _postprocess(items_raw, toks, 8, [])
+                if len(items) < 8:
+                    # Not enough usable model output: top up from the template, never cache that
+                    return {"suggestions": _postprocess(items_raw, toks, 8, deterministic_kras())}
+                result = {"suggestions": items}
+                await SUGGESTIONS.set(cache_key, "suggestions.kras", result)
+                return result
             except Exception as e:
                 logging.warning("Gemini KRAs failed, using deterministic: %s", e)
                 return {"suggestions": deterministic_kras()}
@@ -1244,10 +1244,40 @@ async def get_kras_suggestions(role_id: int, conn = Depends(get_db_connection)):
         ]
         return {"suggestions": generic}
 
+# Multi-radar results per (profile id, profile version). Versions are bumped
+# by every write to a profile, so stale entries are never looked up again and
+# age out of the LRU; the TTL bounds staleness against writes made by other
+# worker processes. The version table is bounded too (see VersionTable).
+MULTI_RADAR_CACHE = LRUCache(
+    maxsize=int(os.getenv("MULTI_RADAR_CACHE_SIZE", "512")),
+    ttl=float(os.getenv("MULTI_RADAR_CACHE_TTL", "300")),
+    name="multi_radar",
+)
+_PROFILE_VERSIONS = VersionTable(maxsize=int(os.getenv("PROFILE_VERSIONS_SIZE", str(MULTI_RADAR_CACHE.maxsize * 4))))
+
+def _profile_version(profile_id: int) -> int:
+    return _PROFILE_VERSIONS.get(profile_id)
+
+def invalidate_profile(profile_id: int) -> None:
+    """Call after any write that changes a profile's ratings or archetype."""
+    MULTI_RADAR_CACHE.pop((profile_id, _PROFILE_VERSIONS.bump(profile_id)))
+
 @app.get("/api/profile/multi-radar/{profile_id}")
-async def get_multi_radar_data(profile_id: int, conn = Depends(get_db_connection)):
+async def get_multi_radar_data(profile_id: int, conn = Depends(get_read_connection)):
     """Get separate radar data for each SKIVE category plus consolidated"""
+    cache_key = (profile_id, _profile_version(profile_id))
+    cached = MULTI_RADAR_CACHE.get(cache_key)
+    if cached is not None:
+        # Served without checking out a connection
+        return cached
     try:
+        # Precomputed at save time (or by the backfill command)
+        row = await queries.fetch_one(conn, queries.MATERIALIZED_RADAR, (profile_id,))
+        if row and row.get('radar'):
+            result = json.loads(row['radar']) if isinstance(row['radar'], (str, bytes)) else row['radar']
+            MULTI_RADAR_CACHE.set(cache_key, result)
+            return result
+
         cursor = await conn.cursor(aiomysql.DictCursor)
         # Fetch from role_profiles, not skive_ratings
         await cursor.execute("SELECT * FROM role_profiles WHERE id = %s", (profile_id,))
@@ -1257,75 +1287,220 @@ async def get_multi_radar_data(profile_id: int, conn = Depends(get_db_connection
         if not profile_row:
             raise HTTPException(status_code=404, detail="Profile not found")
 
-        ratings = []
-        # Prioritize skive JSON column if it exists and is populated
-        if profile_row.get('skive'):
-            try:
-                skive_obj = json.loads(profile_row['skive']) if isinstance(profile_row['skive'], (str, bytes)) else profile_row['skive']
-                ratings = _ratings_from_skive_json(skive_obj)
-            except (json.JSONDecodeError, TypeError):
-                pass # Fallback to wide columns if JSON is invalid
-
-        # Fallback or supplement with wide-format columns
-        if not ratings:
-            ratings = _ratings_from_wide_profile(profile_row)
-
+        ratings = _ratings_from_profile_row(profile_row)
         if not ratings:
             raise HTTPException(status_code=404, detail="No SKIVE data found for profile")
-        
-        # Group by SKIVE category
-        categories = {}
-        for rating in ratings:
-            cat = rating['category'].lower()
-            if cat not in categories:
-                categories[cat] = []
-            categories[cat].append({
-                'subcategory': rating['subcategory'],
-                'score': float(rating['score'])
-            })
-        
-        # Calculate averages for each category
-        category_averages = {}
-        individual_radars = {}
-        
-        for cat, cat_ratings in categories.items():
-            # Calculate average for consolidated radar
-            avg_score = sum(r['score'] for r in cat_ratings) / len(cat_ratings) if cat_ratings else 0
-            category_averages[cat] = avg_score
-            
-            # Individual radar data for this category
-            individual_radars[cat] = {
-                'data': cat_ratings,
-                'average': avg_score
-            }
-        
-        # Generate dynamic archetypes for each category
-        category_archetypes = {}
-        for cat in categories.keys():
-            # Filter ratings for the current category to pass to the function
-            category_specific_ratings = [r for r in ratings if r['category'].lower() == cat.lower()]
-            archetype = await generate_dynamic_archetype(category_specific_ratings, cat, conn)
-            category_archetypes[cat] = archetype
-        
-        # Generate consolidated archetype
-        consolidated_archetype = await generate_consolidated_archetype(ratings, conn)
-        
-        return {
-            'individual_radars': individual_radars,
-            'consolidated_radar': category_averages,
-            'category_archetypes': category_archetypes,
-            'consolidated_archetype': consolidated_archetype
-        }
+
+        result = compute_multi_radar(ratings)
+        MULTI_RADAR_CACHE.set(cache_key, result)
+        return result
     except Exception as e:
         logging.error(f"Error getting multi-radar data: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-def _ratings_from_skive_json(skive_obj: dict, filter_category: Optional[str] = None) -> List[Dict]:
+MULTI_RADAR_BULK_MAX = int(os.getenv("MULTI_RADAR_BULK_MAX", "200"))
+
+class MultiRadarBulkRequest(BaseModel):
+    # Either explicit ids, or a page in list_simulations order (newest first)
+    profile_ids: Optional[List[int]] = None
+    limit: int = 50
+    offset: int = 0
+    include_archetypes: bool = False
+
+def _compact_radar(radar: Dict, include_archetypes: bool) -> Dict:
+    out = {'averages': radar.get('consolidated_radar', {})}
+    if include_archetypes:
+        out['archetype'] = radar.get('consolidated_archetype')
+        out['category_archetypes'] = radar.get('category_archetypes', {})
+    return out
+
+@app.post("/api/profile/multi-radar/bulk")
+async def get_multi_radar_bulk(payload: MultiRadarBulkRequest, conn = Depends(get_read_connection)):
+    """Radar thumbnails for many profiles in one call.
+
+    Returns `{"profiles": {id: {"averages": {...}}}, "missing": [...]}` with
+    per-category averages only, plus the consolidated and per-category
+    archetypes when `include_archetypes` is set. Profile rows (and any
+    materialized radar) are fetched with a single query.
+    """
+    profiles: Dict[int, Dict] = {}
+    missing: List[int] = []
+    if payload.profile_ids is not None:
+        ids = list(dict.fromkeys(payload.profile_ids))
+        if len(ids) > MULTI_RADAR_BULK_MAX:
+            raise HTTPException(status_code=400, detail=f"At most {MULTI_RADAR_BULK_MAX} profile ids per request")
+        # Full radars already cached need no database work
+        pending = []
+        for pid in ids:
+            cached = MULTI_RADAR_CACHE.get((pid, _profile_version(pid)))
+            if cached is not None:
+                profiles[pid] = _compact_radar(cached, payload.include_archetypes)
+            else:
+                pending.append(pid)
+        if not pending:
+            return {"profiles": profiles, "missing": missing}
+        where = f"WHERE rp.id IN ({','.join(['%s'] * len(pending))}) ORDER BY rp.id DESC"
+        args = tuple(pending)
+    else:
+        limit = max(1, min(payload.limit, MULTI_RADAR_BULK_MAX))
+        where = "ORDER BY rp.id DESC LIMIT %s OFFSET %s"
+        args = (limit, max(0, payload.offset))
+        pending = None
+
+    cursor = await conn.cursor(aiomysql.DictCursor)
+    try:
+        await cursor.execute(
+            f"""
+            SELECT rp.*, a.radar AS materialized_radar
+            FROM role_profiles rp
+            LEFT JOIN role_profile_archetypes a ON a.profile_id = rp.id
+            {where}
+            """,
+            args
+        )
+        rows = await cursor.fetchall()
+    finally:
+        await cursor.close()
+
+    for row in rows:
+        pid = row['id']
+        stored = row.get('materialized_radar')
+        if stored:
+            radar = json.loads(stored) if isinstance(stored, (str, bytes)) else stored
+            MULTI_RADAR_CACHE.set((pid, _profile_version(pid)), radar)
+            profiles[pid] = _compact_radar(radar, payload.include_archetypes)
+            continue
+        ratings = _ratings_from_profile_row(row)
+        if not ratings:
+            missing.append(pid)
+        elif payload.include_archetypes:
+            radar = compute_multi_radar(ratings)
+            MULTI_RADAR_CACHE.set((pid, _profile_version(pid)), radar)
+            profiles[pid] = _compact_radar(radar, True)
+        else:
+            # Averages only: skip the archetype work entirely
+            profiles[pid] = {'averages': {
+                cat: sum(r.score for r in cat_ratings) / len(cat_ratings)
+                for cat, cat_ratings in group_ratings(ratings).by_category.items()
+            }}
+
+    if pending is not None:
+        found = {row['id'] for row in rows}
+        missing.extend(pid for pid in pending if pid not in found)
+    return {"profiles": profiles, "missing": missing}
+
+def _ratings_from_profile_row(profile_row: Dict) -> List[Rating]:
+    """Ratings from a role_profiles row: the skive JSON column, else wide columns."""
+    ratings = []
+    # Prioritize skive JSON column if it exists and is populated
+    if profile_row.get('skive'):
+        try:
+            skive_obj = json.loads(profile_row['skive']) if isinstance(profile_row['skive'], (str, bytes)) else profile_row['skive']
+            ratings = _ratings_from_skive_json(skive_obj)
+        except (json.JSONDecodeError, TypeError):
+            pass # Fallback to wide columns if JSON is invalid
+
+    # Fallback or supplement with wide-format columns
+    if not ratings:
+        ratings = _ratings_from_wide_profile(profile_row)
+    return ratings
+
+def compute_multi_radar(ratings: List[Rating]) -> Dict:
+    """Build the multi-radar view: per-category radars and averages plus the
+    per-category and consolidated archetypes."""
+    # Group by SKIVE category (and tier) in one pass
+    groups = group_ratings(ratings)
+
+    category_averages = {}
+    individual_radars = {}
+    category_archetypes = {}
+    for cat, cat_ratings in groups.by_category.items():
+        # Calculate average for consolidated radar
+        avg_score = sum(r.score for r in cat_ratings) / len(cat_ratings)
+        category_averages[cat] = avg_score
+
+        # Individual radar data for this category
+        individual_radars[cat] = {
+            'data': [{'subcategory': r.subcategory, 'score': r.score} for r in cat_ratings],
+            'average': avg_score
+        }
+
+        # Dynamic archetype for this category
+        category_archetypes[cat] = generate_dynamic_archetype(cat_ratings, cat)
+
+    # Generate consolidated archetype
+    consolidated_archetype = generate_consolidated_archetype(groups.ratings)
+
+    return {
+        'individual_radars': individual_radars,
+        'consolidated_radar': category_averages,
+        'category_archetypes': category_archetypes,
+        'consolidated_archetype': consolidated_archetype
+    }
+
+def _archetype_label(radar: Dict) -> Optional[str]:
+    """Short dashboard label: the consolidated signature competencies."""
+    names = [n for n in radar.get('consolidated_archetype', {}).get('signature_competencies', []) if n]
+    return ', '.join(names)[:255] or None
+
+async def _store_materialized_radar(cursor, profile_id: int, radar: Dict) -> None:
+    await cursor.execute(
+        """
+        INSERT INTO role_profile_archetypes (profile_id, archetype_label, radar)
+        VALUES (%s, %s, %s)
+        ON DUPLICATE KEY UPDATE archetype_label=VALUES(archetype_label), radar=VALUES(radar)
+        """,
+        (profile_id, _archetype_label(radar), json.dumps(radar))
+    )
+
+async def backfill_archetypes(only_missing: bool = True) -> int:
+    """Materialize the archetype/radar view for profiles saved before it was
+    computed at write time. Run with `python main.py backfill-archetypes [--all]`.
+
+    Stored radars embed narratives built from competency_descriptors and are
+    not recomputed when phrases change: after editing that table, rerun with
+    `--all` to rewrite every row.
+    """
+    await DB_POOL.start()
+    try:
+        await init_db()
+        # Narratives must come from the table serving uses, not the seed data
+        await _load_phrase_index()
+        async with DB_POOL.connection() as conn:
+            cursor = await conn.cursor(aiomysql.DictCursor)
+            try:
+                if only_missing:
+                    await cursor.execute(
+                        """
+                        SELECT rp.* FROM role_profiles rp
+                        LEFT JOIN role_profile_archetypes a ON a.profile_id = rp.id
+                        WHERE a.profile_id IS NULL
+                        """
+                    )
+                else:
+                    await cursor.execute("SELECT * FROM role_profiles")
+                rows = await cursor.fetchall()
+                count = 0
+                for row in rows:
+                    ratings = _ratings_from_profile_row(row)
+                    if not ratings:
+                        continue
+                    await _store_materialized_radar(cursor, row['id'], compute_multi_radar(ratings))
+                    count += 1
+                await conn.commit()
+            finally:
+                await cursor.close()
+        logging.info("Backfilled archetypes for %d profiles.", count)
+        return count
+    finally:
+        await DB_POOL.close()
+
+def _ratings_from_skive_json(skive_obj: dict, filter_category: Optional[str] = None) -> List[Rating]:
     """Flatten skive JSON {category: {sub: score or {value}}} into list of {category, subcategory, score}.
     Accept both numeric leaves and {value, description} leaves.
     Optionally filter to a single category.
     """
-    out: List[Dict] = []
+    out: List[Rating] = []
     if not isinstance(skive_obj, dict):
         return out
     for cat, subs in skive_obj.items():
@@ -1343,10 +1518,10 @@ def _ratings_from_skive_json(skive_obj: dict, filter_category: Optional[str] = N
                 if isinstance(v, (int, float)):
                     score = float(v)
             if isinstance(score, float):
-                out.append({'category': cat_l, 'subcategory': sub, 'score': score})
+                out.append(Rating(cat_l, sub, score))
     return out
 
-def _ratings_from_wide_profile(profile_row: Dict) -> List[Dict]:
+def _ratings_from_wide_profile(profile_row: Dict) -> List[Rating]:
     """Transforms SKIVE ratings from a wide role_profiles row to a long-format list."""
     ratings = []
     for col, value in profile_row.items():
@@ -1364,25 +1539,29 @@ def _ratings_from_wide_profile(profile_row: Dict) -> List[Dict]:
         # Convert camelCase subcategory to readable words
         readable_subcategory = re.sub(r'(?<!^)(?=[A-Z])', ' ', subcategory).title()
 
-        ratings.append({
-            'category': category,
-            'subcategory': readable_subcategory,
-            'score': float(value)
-        })
+        ratings.append(Rating(category, readable_subcategory, value))
     return ratings
 
-async def generate_consolidated_archetype(all_ratings: List[Dict], conn) -> Dict:
+def generate_consolidated_archetype(all_ratings: List[Rating]) -> Dict:
     """Generate overall consolidated archetype across all SKIVE categories"""
-
-    
+    fingerprint = ratings_fingerprint(all_ratings)
+    key = ('consolidated', PHRASES.version, fingerprint)
+    result = ARCHETYPE_CACHE.get(key)
+    if result is None:
+        result = _build_consolidated_archetype(canonical_ratings(all_ratings))
+        ARCHETYPE_CACHE.set(key, result)
+    return result
+
+def _build_consolidated_archetype(all_ratings: List[Rating]) -> Dict:
     if not all_ratings:
         return {'narrative': 'No profile data available', 'signature_competencies': []}
     
     # Identify top signature competencies across all categories
     signature_comps = identify_signature_competencies(all_ratings, top_n=3)
 
-    # Categorize all ratings by proficiency tier
-    tiers = categorize_by_proficiency_tier(all_ratings)
+    # Group all ratings by category and proficiency tier
+    groups = group_ratings(all_ratings)
+    tiers = groups.by_tier
 
     # Build consolidated narrative using phrase library, mirroring the per-category generator
     narrative_parts: List[str] = []
@@ -1391,22 +1570,9 @@ async def generate_consolidated_archetype(all_ratings: List[Dict], conn) -> Dict
     if signature_comps:
         signature_phrases: List[str] = []
         for comp in signature_comps:
-            cat = str(comp.get('category', '')).lower()
-            sub = comp.get('subcategory', '')
-            score = float(comp.get('score', 0))
-            tier = get_proficiency_tier(score)
-            try:
-                cur = await conn.cursor(aiomysql.DictCursor)
-                await cur.execute(
-                    """SELECT descriptor_phrase FROM competency_descriptors 
-                       WHERE skive_category = %s AND subcategory = %s AND proficiency_tier = %s AND narrative_type = 'signature'""",
-                    (cat, sub, tier)
-                )
-                row = await cur.fetchone()
-            finally:
-                await cur.close()
-            if row and row.get('descriptor_phrase'):
-                signature_phrases.append(row['descriptor_phrase'])
+            phrase = PHRASES.get(comp.category, comp.key, comp.tier, 'signature')
+            if phrase:
+                signature_phrases.append(phrase)
         if signature_phrases:
             narrative_parts.append(f"This role is defined by mastery of {', '.join(signature_phrases)}.")
 
@@ -1415,57 +1581,36 @@ async def generate_consolidated_archetype(all_ratings: List[Dict], conn) -> Dict
     for comp in tiers['high']:
         if comp in signature_comps:
             continue
-        cat = str(comp.get('category', '')).lower()
-        sub = comp.get('subcategory', '')
-        try:
-            cur = await conn.cursor(aiomysql.DictCursor)
-            await cur.execute(
-                """SELECT descriptor_phrase FROM competency_descriptors 
-                   WHERE skive_category = %s AND subcategory = %s AND proficiency_tier = 'high' AND narrative_type = 'supporting'""",
-                (cat, sub)
-            )
-            row = await cur.fetchone()
-        finally:
-            await cur.close()
-        if row and row.get('descriptor_phrase'):
-            supporting_phrases.append(row['descriptor_phrase'])
+        phrase = PHRASES.get(comp.category, comp.key, 'high', 'supporting')
+        if phrase:
+            supporting_phrases.append(phrase)
     if supporting_phrases:
         narrative_parts.append(f"Supported by {', '.join(supporting_phrases)}.")
 
     # Foundational narrative: select top few medium-tier comps
     foundational_phrases: List[str] = []
     for comp in tiers['medium'][:3]:
-        cat = str(comp.get('category', '')).lower()
-        sub = comp.get('subcategory', '')
-        try:
-            cur = await conn.cursor(aiomysql.DictCursor)
-            await cur.execute(
-                """SELECT descriptor_phrase FROM competency_descriptors 
-                   WHERE skive_category = %s AND subcategory = %s AND proficiency_tier = 'medium' AND narrative_type = 'foundational'""",
-                (cat, sub)
-            )
-            row = await cur.fetchone()
-        finally:
-            await cur.close()
-        if row and row.get('descriptor_phrase'):
-            foundational_phrases.append(row['descriptor_phrase'])
+        phrase = PHRASES.get(comp.category, comp.key, 'medium', 'foundational')
+        if phrase:
+            foundational_phrases.append(phrase)
     if foundational_phrases:
         narrative_parts.append(f"Built upon a foundation of {', '.join(foundational_phrases)}.")
 
     # Category strengths map (list of strong subcategories per SKIVE for UI chips)
-    category_strengths: Dict[str, List[str]] = {}
-    for rating in all_ratings:
-        cat = str(rating.get('category', '')).lower()
-        category_strengths.setdefault(cat, [])
-        if float(rating.get('score', 0)) >= 8:
-            category_strengths[cat].append(rating.get('subcategory', ''))
+    category_strengths: Dict[str, List[str]] = {
+        cat: [r.subcategory for r in cat_ratings if r.score >= 8]
+        for cat, cat_ratings in groups.by_category.items()
+    }
 
     return {
         'narrative': ' '.join(narrative_parts) if narrative_parts else 'Balanced professional competence across all SKIVE dimensions.',
-        'signature_competencies': [comp.get('subcategory', '') for comp in signature_comps],
+        'signature_competencies': [comp.subcategory for comp in signature_comps],
         'category_strengths': category_strengths
     }
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    if sys.argv[1:2] == ["backfill-archetypes"]:
+        asyncio.run(backfill_archetypes(only_missing="--all" not in sys.argv[2:]))
+    else:
+        import uvicorn
+        uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,83 @@
+"""
+Canonical competency keys
+
+Subcategory names reach the archetype code in several spellings of the same
+competency: title case from the seed data and wide role_profiles columns
+("Decision Making"), snake_case from the SQL migration ("decision_making"),
+and camelCase from the frontend's SKIVE JSON ("decisionMaking"). Each of
+them resolves to one canonical id, the snake_case form.
+"""
+import re
+from typing import Dict, Iterable
+
+_CAMEL_BOUNDARY = re.compile(r'(?<=[a-z0-9])(?=[A-Z])')
+_SEPARATORS = re.compile(r'[\s_\-/]+')
+
+
+def canonical_key(name) -> str:
+    """'Decision Making' / 'decisionMaking' / 'decision_making' -> 'decision_making'"""
+    words = _SEPARATORS.split(_CAMEL_BOUNDARY.sub(' ', str(name or '')).strip())
+    return '_'.join(w.lower() for w in words if w)
+
+
+def _aliases(key: str):
+    words = key.split('_')
+    yield key
+    yield ' '.join(words)
+    yield ' '.join(w.title() for w in words)
+    yield words[0] + ''.join(w.title() for w in words[1:])
+
+
+class CompetencyKeys:
+    """Alias map from every known spelling to its canonical id.
+
+    Known competencies (those with descriptor phrases) have their camel,
+    snake and title forms precomputed; other spellings are normalized on
+    first sight and remembered, and counted as unknown.
+    """
+
+    # Bounds the memo of spellings that aren't registered competencies
+    MAX_UNKNOWN = 4096
+
+    def __init__(self, names: Iterable[str] = ()):
+        self._aliases: Dict[str, str] = {}
+        self.known = set()
+        self.resolved = 0
+        self.unknown = 0
+        self.register(names)
+
+    def register(self, names: Iterable[str]) -> None:
+        for name in names:
+            key = canonical_key(name)
+            if not key:
+                continue
+            self.known.add(key)
+            self._aliases[str(name)] = key
+            for alias in _aliases(key):
+                self._aliases[alias] = key
+
+    def resolve(self, name) -> str:
+        self.resolved += 1
+        key = self._aliases.get(name)
+        if key is None:
+            key = canonical_key(name)
+            if key not in self.known:
+                self.unknown += 1
+            if len(self._aliases) < len(self.known) * 4 + self.MAX_UNKNOWN:
+                self._aliases[str(name)] = key
+        elif key not in self.known:
+            self.unknown += 1
+        return key
+
+    def stats(self) -> Dict:
+        return {
+            "known": len(self.known),
+            "aliases": len(self._aliases),
+            "resolved": self.resolved,
+            "unknown": self.unknown,
+            "unknown_rate": round(self.unknown / self.resolved, 4) if self.resolved else 0.0,
+        }
+
+
+# Shared registry; PhraseIndex registers every subcategory it loads
+COMPETENCY_KEYS = CompetencyKeys()
@@ -9,6 +9,7 @@ Proficiency Tiers:
 - Medium (4-7): Professional Competence Required  
 - High (8-10): Strategic Mastery Required
 """
+from models.competency_keys import COMPETENCY_KEYS, CompetencyKeys, canonical_key
 
 # Database schema for competency_descriptors table
 CREATE_COMPETENCY_DESCRIPTORS_TABLE = """
@@ -114,6 +115,102 @@ COMPETENCY_DESCRIPTORS_SEED_DATA = [
     ('ethics', 'Social Responsibility', 'high', 'requiring visionary leadership in corporate social responsibility and societal impact', 'signature'),
 ]
 
+# Narrative type whose phrase a tier-only lookup prefers; mirrors the seed data
+TIER_NARRATIVE_TYPES = {'high': 'signature', 'medium': 'supporting', 'low': 'foundational'}
+
+
+class PhraseIndex:
+    """In-memory view of competency_descriptors keyed by
+    (category, subcategory, tier, narrative_type).
+
+    Category, tier and narrative type are case-folded and trimmed to match
+    how MySQL's default collation compared them when lookups were queries;
+    subcategories are resolved to canonical competency keys so title, snake
+    and camel spellings all hit.
+    """
+
+    def __init__(self, rows=(), keys: CompetencyKeys = COMPETENCY_KEYS):
+        self._phrases = {}
+        self._by_competency = {}
+        self.keys = keys
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.replace(rows)
+
+    @classmethod
+    def from_seed(cls) -> "PhraseIndex":
+        return cls(COMPETENCY_DESCRIPTORS_SEED_DATA)
+
+    @staticmethod
+    def _key(category: str, competency: str, tier: str, narrative_type: str):
+        return (
+            str(category or '').strip().lower(),
+            competency,
+            str(tier or '').strip().lower(),
+            str(narrative_type or '').strip().lower(),
+        )
+
+    def replace(self, rows) -> None:
+        """Swap in (category, subcategory, tier, phrase, narrative_type) rows."""
+        phrases = {}
+        ranked = {}
+        for category, subcategory, tier, phrase, narrative_type in rows:
+            if phrase:
+                self.keys.register((subcategory,))
+                competency = canonical_key(subcategory)
+                key = self._key(category, competency, tier, narrative_type)
+                phrases.setdefault(key, phrase)
+                # Several rows can share a (competency, tier); pick one by
+                # narrative type, then category, not by row order
+                _, _, tier_lower, type_lower = key
+                rank = (type_lower != TIER_NARRATIVE_TYPES.get(tier_lower), key[0], type_lower)
+                current = ranked.get((competency, tier_lower))
+                if current is None or rank < current[0]:
+                    ranked[(competency, tier_lower)] = (rank, phrase)
+        self._phrases = phrases
+        self._by_competency = {k: phrase for k, (_, phrase) in ranked.items()}
+        # Lets memoized narratives built from older phrases be told apart
+        self.version += 1
+
+    def _count(self, phrase):
+        if phrase is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return phrase
+
+    def get(self, category: str, competency: str, tier: str, narrative_type: str):
+        """Lookup by an already-canonical competency key (Rating.key), so the
+        key registry counts each rating once, when the Rating is built."""
+        return self._count(self._phrases.get(self._key(category, competency, tier, narrative_type)))
+
+    def get_by_competency(self, key: str, tier: str):
+        """Lookup by competency key and tier alone, for callers (the flat
+        SKIVE archetype logic) that don't know the category or narrative type."""
+        competency = self.keys.resolve(key)
+        return self._count(self._by_competency.get((competency, str(tier or '').strip().lower())))
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._phrases),
+            "version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "miss_rate": round(self.misses / lookups, 4) if lookups else 0.0,
+            "keys": self.keys.stats(),
+        }
+
+    def __len__(self) -> int:
+        return len(self._phrases)
+
+
+# Shared index: seeded at import, reloaded from the competency_descriptors
+# table at startup (main._load_phrase_index).
+PHRASES = PhraseIndex.from_seed()
+
+
 def get_proficiency_tier(score: float) -> str:
     """Convert 1-10 scale to proficiency tier"""
     if score <= 3:
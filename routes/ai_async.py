@@ -1,5 +1,5 @@
 # routes/ai_async.py
-import os
+import ast
 import json
 import re
 import asyncio
@@ -11,23 +11,8 @@ from pydantic import BaseModel
 import logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
 
-# Optional Gemini config
-try:
-    import google.generativeai as genai
-except Exception:  # pragma: no cover
-    genai = None
-
-API_KEY = os.getenv("GEMINI_API_KEY")
-DISABLE_AI = os.getenv("DISABLE_AI", "1") == "1"
-if API_KEY and genai is not None:
-    try:
-        genai.configure(api_key=API_KEY)
-        _model = genai.GenerativeModel("gemini-1.5-flash")
-    except Exception:  # pragma: no cover
-        _model = None
-else:
-    _model = None
-
+# Gemini is configured once in main.py and shared through app.state
+# (gemini_model / disable_ai for the checks, gemini for the calls).
 router = APIRouter()
 
 # --- Models ---
@@ -51,30 +36,30 @@ class ObjectiveResponse(BaseModel):
 
 # --- DB ---
 from fastapi import Request
+from db.pool import request_client_key
+from db import queries
+from backend.archetype_logic import flatten_skive, get_tier
+from backend.gemini import GeminiBusy
 
 async def get_conn(request: Request):
-    pool = request.app.state.mysql_pool
-    async with pool.acquire() as conn:
+    """Lazy read connection. AI handlers only need it to resolve role names and
+    must `await conn.release()` before calling Gemini, so a slow model round
+    trip never holds a pooled connection."""
+    pool = request.app.state.db_pool
+    client = request_client_key(request)
+    async with pool.lazy_connection(lambda: pool.read_connection(client)) as conn:
         yield conn
 
 async def _resolve_role_context(conn, key: RoleKey) -> Dict[str, str]:
     ctx = {"profession": "", "department": "", "role": ""}
-    cur = await conn.cursor()
-    try:
-        if key.profession:
-            await cur.execute("SELECT name FROM professions WHERE id=%s", (key.profession,))
-            row = await cur.fetchone()
-            ctx["profession"] = row[0] if row else ""
-        if key.department:
-            await cur.execute("SELECT name FROM departments WHERE id=%s", (key.department,))
-            row = await cur.fetchone()
-            ctx["department"] = row[0] if row else ""
-        if key.role:
-            await cur.execute("SELECT name FROM roles WHERE id=%s", (key.role,))
-            row = await cur.fetchone()
-            ctx["role"] = row[0] if row else ""
-    finally:
-        await cur.close()
+    if not (key.profession or key.department or key.role):
+        return ctx
+    row = await queries.fetch_one(
+        conn, queries.ROLE_CONTEXT_NAMES,
+        (key.profession or None, key.department or None, key.role or None),
+    )
+    if row:
+        ctx["profession"], ctx["department"], ctx["role"] = (v or "" for v in row)
     return ctx
 
 # --- Helpers ---
@@ -108,8 +93,11 @@ def _extract_items_json(text: str) -> List[str]:
 
 # --- AI endpoints ---
 @router.post("/day_to_day")
-async def suggest_day_to_day(key: RoleKey, conn = Depends(get_conn)):
+async def suggest_day_to_day(key: RoleKey, request: Request, conn = Depends(get_conn)):
+    _model = request.app.state.gemini_model
+    DISABLE_AI = request.app.state.disable_ai
     ctx = await _resolve_role_context(conn, key)
+    await conn.release()
     profession = ctx.get("profession", ""); department = ctx.get("department", ""); role = ctx.get("role", "")
     toks = _tokens(profession, department, role)
 
@@ -136,6 +124,11 @@ async def suggest_day_to_day(key: RoleKey, conn = Depends(get_conn)):
             f"Profession: {profession}\nDepartment: {department}\nRole: {role}\n"
             "Be specific, measurable, relevant to the role context."
         )
+        cache = request.app.state.suggestion_cache
+        cache_key = cache.key("day_to_day", prompt)
+        cached = await cache.get(cache_key)
+        if cached is not None:
+            return cached
         for attempt in range(2):
             try:
                 prompt = (
@@ -143,7 +136,7 @@ async def suggest_day_to_day(key: RoleKey, conn = Depends(get_conn)):
                     f"Profession: {profession}\nDepartment: {department}\nRole: {role}\n"
                     "Be specific, measurable, relevant to the role context."
                 )
-                resp = await _model.generate_content_async(prompt)
+                resp = await request.app.state.gemini.generate(prompt)
                 logging.info("[day_to_day] Gemini AI success.")
                 text = resp.text if hasattr(resp, "text") else (resp.candidates[0].content.parts[0].text if resp and resp.candidates else "")
                 items_raw = _extract_items_json(text)
@@ -153,12 +146,15 @@ async def suggest_day_to_day(key: RoleKey, conn = Depends(get_conn)):
                     if s and all(t not in s.lower() for t in toks):
                         items.append(s)
                 if len(items) < 6:
+                    # Template output is not cached and not reported as AI
                     logging.info("[day_to_day] Gemini AI fallback triggered due to insufficient items.")
-                    items = deterministic_items()
-                return {"items": items, "source": "ai"}
+                    return {"items": deterministic_items(), "source": "default"}
+                result = {"items": items, "source": "ai"}
+                await cache.set(cache_key, "day_to_day", result)
+                return result
             except Exception as e:
                 logging.error(f"[day_to_day] Gemini failed: {e}", exc_info=True)
-                if attempt == 0:
+                if attempt == 0 and not isinstance(e, GeminiBusy):
                     await asyncio.sleep(0.3)
                     continue
                 logging.info("[day_to_day] Gemini AI fallback triggered after error.")
@@ -175,6 +171,7 @@ async def suggest_kras(key: RoleKey, request: Request, conn = Depends(get_conn))
     DISABLE_AI = request.app.state.disable_ai
     logging.info(f"[kras] ENTRY: _model={_model}, DISABLE_AI={DISABLE_AI}")
     ctx = await _resolve_role_context(conn, key)
+    await conn.release()
     profession = ctx.get("profession", ""); department = ctx.get("department", ""); role = ctx.get("role", "")
     toks = _tokens(profession, department, role)
 
@@ -191,15 +188,22 @@ async def suggest_kras(key: RoleKey, request: Request, conn = Depends(get_conn))
             f"Identify and mitigate top 3 operational risks quarterly",
         ]
 
+    cache = request.app.state.suggestion_cache
+    prompt = (
+        "Generate 6-8 SMART KRAs as JSON {\"items\": [\"...\"]}.\n"
+        f"Profession: {profession}\nDepartment: {department}\nRole: {role}"
+    )
+    cache_key = cache.key("kras", prompt)
+    if _model and not DISABLE_AI:
+        cached = await cache.get(cache_key)
+        if cached is not None:
+            return cached
+
     for attempt in range(2):
         if _model and not DISABLE_AI:
             logging.info("[kras] Gemini AI will be called.")
             try:
-                prompt = (
-                    "Generate 6-8 SMART KRAs as JSON {\"items\": [\"...\"]}.\n"
-                    f"Profession: {profession}\nDepartment: {department}\nRole: {role}"
-                )
-                resp = await _model.generate_content_async(prompt)
+                resp = await request.app.state.gemini.generate(prompt)
                 logging.info("[kras] Gemini AI success.")
                 text = resp.text if hasattr(resp, "text") else (resp.candidates[0].content.parts[0].text if resp and resp.candidates else "")
                 items_raw = _extract_items_json(text)
@@ -209,12 +213,15 @@ async def suggest_kras(key: RoleKey, request: Request, conn = Depends(get_conn))
                     if s and all(t not in s.lower() for t in toks):
                         items.append(s)
                 if len(items) < 5:
+                    # Template output is not cached and not reported as AI
                     logging.info("[kras] Gemini AI fallback triggered due to insufficient items.")
-                    items = deterministic_kras()
-                return {"items": items, "source": "ai"}
+                    return {"items": deterministic_kras(), "source": "default"}
+                result = {"items": items, "source": "ai"}
+                await cache.set(cache_key, "kras", result)
+                return result
             except Exception as e:
                 logging.error(f"[kras] Gemini failed: {e}", exc_info=True)
-                if attempt == 0:
+                if attempt == 0 and not isinstance(e, GeminiBusy):
                     await asyncio.sleep(0.3)
                     continue
                 logging.info("[kras] Gemini AI fallback triggered after error.")
@@ -232,6 +239,7 @@ async def suggest_objectives(req: ObjectiveRequest, request: Request, conn = Dep
     logging.info(f"[objectives] ENTRY: _model={_model}, DISABLE_AI={DISABLE_AI}")
     path = req.path
     ctx = await _resolve_role_context(conn, req.key)
+    await conn.release()
     profession = ctx.get("profession", "").strip() or ""
     department = ctx.get("department", "").strip() or ""
     role = ctx.get("role", "").strip() or ""
@@ -244,16 +252,23 @@ async def suggest_objectives(req: ObjectiveRequest, request: Request, conn = Dep
             advanced=f"Lead a complex scenario requiring {base}, documenting approach and outcomes within this quarter."
         )
 
+    cache = request.app.state.suggestion_cache
+    prompt = (
+        "You are an assistant generating SMART simulation objectives for a specific SKIVE sub-competency.\n\n"
+        f"Profession: {profession}\nDepartment: {department}\nRole: {role}\nPath: {path}\n\n"
+        "Respond ONLY with JSON object: {\"basic\": \"...\", \"intermediate\": \"...\", \"advanced\": \"...\"}."
+    )
+    cache_key = cache.key("objectives", prompt)
+    if _model and not DISABLE_AI:
+        cached = await cache.get(cache_key)
+        if cached is not None:
+            return ObjectiveResponse(levels=ObjectiveLevels(**cached["levels"]), source=cached["source"])
+
     for attempt in range(2):
         if _model and not DISABLE_AI:
             logging.info("[objectives] Gemini AI will be called.")
             try:
-                prompt = (
-                    "You are an assistant generating SMART simulation objectives for a specific SKIVE sub-competency.\n\n"
-                    f"Profession: {profession}\nDepartment: {department}\nRole: {role}\nPath: {path}\n\n"
-                    "Respond ONLY with JSON object: {\"basic\": \"...\", \"intermediate\": \"...\", \"advanced\": \"...\"}."
-                )
-                resp = await _model.generate_content_async(prompt)
+                resp = await request.app.state.gemini.generate(prompt)
                 logging.info("[objectives] Gemini AI success.")
                 text = resp.text if hasattr(resp, "text") else (resp.candidates[0].content.parts[0].text if resp and resp.candidates else "")
                 s = text.strip() if text else ""
@@ -265,15 +280,20 @@ async def suggest_objectives(req: ObjectiveRequest, request: Request, conn = Dep
                 data = json.loads(s)
                 if not isinstance(data, dict):
                     raise ValueError("Parse failure")
+                generated = {k: str(data.get(k, "")).strip() for k in ("basic", "intermediate", "advanced")}
+                det = _deterministic_objectives(path)
                 levels = ObjectiveLevels(
-                    basic=str(data.get("basic", "")).strip() or _deterministic_objectives(path).basic,
-                    intermediate=str(data.get("intermediate", "")).strip() or _deterministic_objectives(path).intermediate,
-                    advanced=str(data.get("advanced", "")).strip() or _deterministic_objectives(path).advanced,
+                    basic=generated["basic"] or det.basic,
+                    intermediate=generated["intermediate"] or det.intermediate,
+                    advanced=generated["advanced"] or det.advanced,
                 )
+                # Only cache replies where the model supplied every level
+                if all(generated.values()):
+                    await cache.set(cache_key, "objectives", {"levels": generated, "source": "ai"})
                 return ObjectiveResponse(levels=levels, source="ai")
             except Exception as e:
                 logging.error(f"[objectives] Gemini failed: {e}", exc_info=True)
-                if attempt == 0:
+                if attempt == 0 and not isinstance(e, GeminiBusy):
                     await asyncio.sleep(0.3)
                     continue
                 logging.info("[objectives] Gemini AI fallback triggered after error.")
@@ -304,49 +324,51 @@ async def suggest_archetype_info(
     request: Request,
     conn = Depends(get_conn)
 ) -> ArchetypeInfoResponse:
-    import traceback
     # --- Resolve profession, department, role IDs to names ---
-    from .ai_async import _resolve_role_context
     ctx = await _resolve_role_context(conn, req)
+    await conn.release()
     profession = ctx.get("profession", "")
     department = ctx.get("department", "")
     role = ctx.get("role", "")
-    try:
-        _model = request.app.state.gemini_model
-        DISABLE_AI = request.app.state.disable_ai
-        # --- main logic continues here ---
-    except Exception:
-        return ArchetypeInfoResponse(
-            archetype={
+
+    def default_archetype() -> Dict:
+        return {
+            "archetype": {
                 "name": "Analytical Strategist",
                 "description": "Data-driven decision maker, excels at breaking down complex problems, and devising actionable strategies.",
                 "examples": ["Management Consultant"]
             },
-            global_archetype_summary="This role operates at a strategic level, requiring high-level decision making, critical evaluation, and empathy. Supporting skills include precision, coordination, self-regulation, and mastery of both technical and interpersonal competencies.",
-            profession_info={
-                "summary": f"The {profession} in {department} ({role}) plays a key role in organizational success.",
-                "years_to_role": "5-8 years",
-                "qualifications": "Master's in Data Science or related field",
-                "certifications": "Certified Data Scientist (CDS), AWS Certified Machine Learning",
-                "salary_range": "$120,000 - $180,000 USD",
-                "perks": "Flexible hours, remote work, conference travel, stock options",
-                "highs": "High impact, leadership, innovation opportunities",
-                "lows": "High pressure, rapid tech changes, cross-team dependencies",
-                "career_pathway": "Senior Data Scientist → Lead Data Scientist → Manager of Data Science → Director of Analytics"
-            },
+            "global_archetype_summary": "This role operates at a strategic level, requiring high-level decision making, critical evaluation, and empathy. Supporting skills include precision, coordination, self-regulation, and mastery of both technical and interpersonal competencies.",
+        }
+
+    def default_profession_info() -> Dict:
+        return {
+            "summary": f"The {profession} in {department} ({role}) plays a key role in organizational success.",
+            "years_to_role": "5-8 years",
+            "qualifications": "Master's in Data Science or related field",
+            "certifications": "Certified Data Scientist (CDS), AWS Certified Machine Learning",
+            "salary_range": "$120,000 - $180,000 USD",
+            "perks": "Flexible hours, remote work, conference travel, stock options",
+            "highs": "High impact, leadership, innovation opportunities",
+            "lows": "High pressure, rapid tech changes, cross-team dependencies",
+            "career_pathway": "Senior Data Scientist → Lead Data Scientist → Manager of Data Science → Director of Analytics"
+        }
+
+    def fallback() -> ArchetypeInfoResponse:
+        return ArchetypeInfoResponse(
+            **default_archetype(),
+            profession_info=default_profession_info(),
             source="default"
         )
 
-    # --- New AI logic ---
-    import importlib.util
-    import ast
-    import sys
-    logic_path = "backend/archetype_logic.py"
-    spec = importlib.util.spec_from_file_location("archetype_logic", logic_path)
-    archetype_logic = importlib.util.module_from_spec(spec)
-    sys.modules["archetype_logic"] = archetype_logic
-    spec.loader.exec_module(archetype_logic)
+    try:
+        _model = request.app.state.gemini_model
+        DISABLE_AI = request.app.state.disable_ai
+        gemini = request.app.state.gemini
+    except Exception:
+        return fallback()
 
+    # --- New AI logic ---
     def parse_skive(skive_str):
         # Try to safely parse the incoming string as a dict
         try:
@@ -356,19 +378,18 @@ async def suggest_archetype_info(
 
     global_profile = getattr(req, "global_archetype_profile", "") or ""
     skive = parse_skive(global_profile)
-    flat = archetype_logic.flatten_skive(skive) if skive else []
-    high_comp = [k for k, v in flat if archetype_logic.get_tier(v) == "High"]
-    medium_comp = [k for k, v in flat if archetype_logic.get_tier(v) == "Medium"]
+    flat = flatten_skive(skive) if skive else []
+    high_comp = [k for k, v in flat if get_tier(v) == "High"]
+    medium_comp = [k for k, v in flat if get_tier(v) == "Medium"]
     high_comp_str = ", ".join(high_comp) if high_comp else "None"
     medium_comp_str = ", ".join(medium_comp) if medium_comp else "None"
 
-    import traceback
     logging.info(f"[archetype_info] ENTRY: profession={profession}, department={department}, role={role}, global_profile={str(global_profile)[:100]}")
-    for attempt in range(2):
-        if _model and not DISABLE_AI:
-            try:
-                # Prompt 1: Global Archetype Summary
-                dna_prompt = f"""
+    if not (_model and not DISABLE_AI):
+        return fallback()
+
+    # Prompt 1: Global Archetype Summary
+    dna_prompt = f"""
 You are an expert Organizational Behavior consultant and a master of pedagogical design, specializing in analyzing professional roles. I will provide you with a \"Role DNA\" profile, which is a list of competencies required for a specific job, rated on their importance (High or Medium).
 Your task is to synthesize this raw data into a concise, insightful Global Archetype Summary.
 Instructions:
@@ -388,17 +409,8 @@ Medium Importance Competencies:
 {medium_comp_str}
 Respond with a JSON object: {{ "archetype": {{ "name": str, "description": str, "examples": [str, ...] }}, "global_archetype_summary": str }}
 """
-                resp1 = await _model.generate_content_async(dna_prompt)
-                text1 = resp1.text if hasattr(resp1, "text") else (resp1.candidates[0].content.parts[0].text if resp1 and resp1.candidates else "")
-                s1 = text1.strip() if text1 else ""
-                if s1.startswith("```"):
-                    s1 = "\n".join(s1.splitlines()[1:])
-                    if s1.strip().endswith("```"):
-                        s1 = "\n".join(s1.splitlines()[:-1])
-                    s1 = s1.strip()
-                data1 = json.loads(s1)
-                # Prompt 2: Profession Info
-                prof_prompt = f"""
+    # Prompt 2: Profession Info
+    prof_prompt = f"""
 You are an expert career research analyst with access to vast amounts of public domain data about professional roles. I will provide you with a specific job title, including its profession and department.
 Your task is to generate a concise, realistic, and helpful \"Profession Info\" summary for this role.
 Instructions:
@@ -413,33 +425,42 @@ Department: {department}
 Specific Role: {role}
 Respond with a JSON object: {{ "profession_info": {{ "summary": str, "years_to_role": str, "qualifications": str, "certifications": str, "salary_range": str, "perks": str, "highs": str, "lows": str, "career_pathway": str }} }}
 """
-                resp2 = await _model.generate_content_async(prof_prompt)
-                text2 = resp2.text if hasattr(resp2, "text") else (resp2.candidates[0].content.parts[0].text if resp2 and resp2.candidates else "")
-                s2 = text2.strip() if text2 else ""
-                if s2.startswith("```"):
-                    s2 = "\n".join(s2.splitlines()[1:])
-                    if s2.strip().endswith("```"):
-                        s2 = "\n".join(s2.splitlines()[:-1])
-                    s2 = s2.strip()
-                data2 = json.loads(s2)
-                if not ("archetype" in data1 and "global_archetype_summary" in data1 and "profession_info" in data2):
+
+    async def ask(label: str, prompt: str, required: Dict[str, type]) -> Optional[Dict]:
+        """One prompt with one retry; None means use that half's fallback."""
+        for attempt in range(2):
+            try:
+                resp = await gemini.generate(prompt)
+                text = resp.text if hasattr(resp, "text") else (resp.candidates[0].content.parts[0].text if resp and resp.candidates else "")
+                s = text.strip() if text else ""
+                if s.startswith("```"):
+                    s = "\n".join(s.splitlines()[1:])
+                    if s.strip().endswith("```"):
+                        s = "\n".join(s.splitlines()[:-1])
+                    s = s.strip()
+                data = json.loads(s)
+                # Each required key must be present with the expected type
+                if not (isinstance(data, dict) and all(isinstance(data.get(k), t) for k, t in required.items())):
                     raise ValueError("Parse failure")
-                return ArchetypeInfoResponse(
-                    archetype=data1["archetype"],
-                    global_archetype_summary=data1["global_archetype_summary"],
-                    profession_info=data2["profession_info"],
-                    source="ai"
-                )
+                return data
             except Exception as e:
-                tb = traceback.format_exc()
-                logging.error(f"[archetype_info] Gemini failed: {e}\n{tb}")
-                # Return error details in response for debugging (remove in prod)
-                return ArchetypeInfoResponse(
-                    archetype={},
-                    global_archetype_summary="",
-                    profession_info={"error": str(e), "traceback": tb},
-                    source="error"
-                )
-        else:
-            return fallback()
-    return fallback()
\ No newline at end of file
+                logging.error(f"[archetype_info] {label} prompt failed: {e}", exc_info=True)
+                if attempt == 0 and not isinstance(e, GeminiBusy):
+                    await asyncio.sleep(0.3)
+                    continue
+                return None
+
+    # The two prompts are independent: latency is the slower of the two
+    data1, data2 = await asyncio.gather(
+        ask("dna", dna_prompt, {"archetype": dict, "global_archetype_summary": str}),
+        ask("profession", prof_prompt, {"profession_info": dict}),
+    )
+    if data1 is None and data2 is None:
+        return fallback()
+    archetype_half = data1 if data1 is not None else default_archetype()
+    return ArchetypeInfoResponse(
+        archetype=archetype_half["archetype"],
+        global_archetype_summary=archetype_half["global_archetype_summary"],
+        profession_info=data2["profession_info"] if data2 is not None else default_profession_info(),
+        source="ai" if data1 is not None and data2 is not None else "partial"
+    )
@@ -1,26 +1,25 @@
 # routes/meta_async.py
 import os
 from typing import Optional
-import aiomysql
 from fastapi import APIRouter, Depends, HTTPException
 
 router = APIRouter()
 
 from fastapi import Request
+from db.pool import request_client_key
+from db import queries
 
 async def get_conn(request: Request):
-    pool = request.app.state.mysql_pool
-    async with pool.acquire() as conn:
+    # Catalog lookups only read, so they may be served by the replica
+    pool = request.app.state.db_pool
+    client = request_client_key(request)
+    async with pool.lazy_connection(lambda: pool.read_connection(client)) as conn:
         yield conn
 
 @router.get("/professions")
 async def get_professions(conn = Depends(get_conn)):
     try:
-        cursor = await conn.cursor(aiomysql.DictCursor)
-        await cursor.execute("SELECT id, name FROM professions ORDER BY id LIMIT 20")
-        rows = await cursor.fetchall()
-        await cursor.close()
-        return rows
+        return await queries.fetch_all(conn, queries.PROFESSIONS_LIST)
     except Exception:
         raise HTTPException(status_code=500, detail="Failed to fetch professions")
 
@@ -33,14 +32,7 @@ async def get_departments(profession_id: Optional[str] = None, conn = Depends(ge
             prof_id_int = int(profession_id)
         except Exception:
             return []
-        cursor = await conn.cursor(aiomysql.DictCursor)
-        await cursor.execute(
-            "SELECT id, name, profession_id FROM departments WHERE profession_id = %s ORDER BY id",
-            (prof_id_int,)
-        )
-        rows = await cursor.fetchall()
-        await cursor.close()
-        return rows
+        return await queries.fetch_all(conn, queries.DEPARTMENTS_BY_PROFESSION, (prof_id_int,))
     except Exception:
         raise HTTPException(status_code=500, detail="Failed to fetch departments")
 
@@ -53,13 +45,6 @@ async def get_roles(department_id: Optional[str] = None, conn = Depends(get_conn
             dept_id_int = int(department_id)
         except Exception:
             return []
-        cursor = await conn.cursor(aiomysql.DictCursor)
-        await cursor.execute(
-            "SELECT id, name, department_id FROM roles WHERE department_id = %s ORDER BY id",
-            (dept_id_int,)
-        )
-        rows = await cursor.fetchall()
-        await cursor.close()
-        return rows
+        return await queries.fetch_all(conn, queries.ROLES_BY_DEPARTMENT, (dept_id_int,))
     except Exception:
         raise HTTPException(status_code=500, detail="Failed to fetch roles")
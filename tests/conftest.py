@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def fake_pool():
+    from fakes import FakePool
+
+    return FakePool(maxsize=1, responses={
+        "FROM professions WHERE id": lambda args: [tuple(f"name-{a}" for a in args)],
+        "FROM professions ORDER BY": [{"id": 1, "name": "Engineering"}],
+    })
@@ -0,0 +1,237 @@
+# In-memory stand-ins for the async tests: PoolManager's checkout surface
+# with a hard connection limit, the slice of aiomysql.Pool that a real
+# PoolManager drives, and a slow Gemini model.
+import asyncio
+import json
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+from db.pool import LazyConnection, PoolManager
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self._conn = conn
+        self._rows = []
+        self.rowcount = 0
+
+    async def execute(self, query, args=None):
+        self._conn.executed.append(query)
+        for marker, rows in self._conn.responses.items():
+            if marker in query:
+                self._rows = rows(args) if callable(rows) else rows
+                break
+        else:
+            self._rows = []
+        self.rowcount = len(self._rows)
+
+    async def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    async def fetchall(self):
+        return list(self._rows)
+
+    async def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, responses, executed):
+        self.responses = responses
+        self.executed = executed
+
+    async def cursor(self, *cursors):
+        return FakeCursor(self)
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+
+class FakePool:
+    """PoolManager's checkout surface over `maxsize` fake connections.
+
+    `responses` maps a SQL fragment to the rows returned for statements
+    containing it (or to a callable taking the statement's args).
+    """
+
+    def __init__(self, maxsize=1, responses=None):
+        self.maxsize = maxsize
+        self.responses = responses or {}
+        self.executed = []
+        self.in_use = 0
+        self.max_in_use = 0
+        self._slots = None
+
+    @property
+    def slots(self):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.maxsize)
+        return self._slots
+
+    @asynccontextmanager
+    async def connection(self):
+        async with self.slots:
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+            try:
+                yield FakeConnection(self.responses, self.executed)
+            finally:
+                self.in_use -= 1
+
+    def read_connection(self, client_key=None):
+        return self.connection()
+
+    def write_connection(self, client_key=None):
+        return self.connection()
+
+    @asynccontextmanager
+    async def lazy_connection(self, checkout=None):
+        handle = LazyConnection(checkout or self.connection)
+        try:
+            yield handle
+        finally:
+            await handle.release()
+
+
+class _AwaitableContext:
+    """Result of aiomysql calls usable both as `await x` and `async with x`."""
+
+    def __init__(self, make, on_exit=None):
+        self._make = make
+        self._on_exit = on_exit
+        self._value = None
+
+    def __await__(self):
+        return self._make().__await__()
+
+    async def __aenter__(self):
+        self._value = await self._make()
+        return self._value
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self._on_exit is not None:
+            await self._on_exit(self._value)
+
+
+class FakeMySQLConnection(FakeConnection):
+    """A pooled aiomysql connection: cursors, ping, close, last_usage."""
+
+    def __init__(self, responses, executed):
+        super().__init__(responses, executed)
+        self.closed = False
+        self.last_usage = time.monotonic()
+        self.pings = 0
+        self.ping_error = None
+
+    def cursor(self, *cursors):
+        return _AwaitableContext(lambda: FakeConnection.cursor(self, *cursors))
+
+    async def ping(self, reconnect=False):
+        self.pings += 1
+        if self.ping_error is not None:
+            raise self.ping_error
+
+    def close(self):
+        self.closed = True
+
+
+class FakeMySQLPool:
+    """The parts of aiomysql.Pool that PoolManager touches. Connections are
+    handed out oldest-first from `_free` and appended back on release."""
+
+    def __init__(self, maxsize=4, responses=None):
+        self.maxsize = maxsize
+        self.responses = responses or {}
+        self.executed = []
+        self.acquire_error = None
+        self.closed = False
+        self._free = deque()
+        self._used = set()
+
+    @property
+    def size(self):
+        return len(self._free) + len(self._used)
+
+    @property
+    def freesize(self):
+        return len(self._free)
+
+    def add_idle(self, count, idle_for=0.0):
+        conns = [FakeMySQLConnection(self.responses, self.executed) for _ in range(count)]
+        for conn in conns:
+            conn.last_usage = time.monotonic() - idle_for
+            self._free.append(conn)
+        return conns
+
+    async def _acquire(self):
+        if self.acquire_error is not None:
+            raise self.acquire_error
+        if self._free:
+            conn = self._free.popleft()
+        else:
+            conn = FakeMySQLConnection(self.responses, self.executed)
+        self._used.add(conn)
+        return conn
+
+    def acquire(self):
+        return _AwaitableContext(self._acquire, self.release)
+
+    async def release(self, conn):
+        self._used.discard(conn)
+        if not conn.closed and not self.closed:
+            self._free.append(conn)
+
+    def close(self):
+        self.closed = True
+
+    async def wait_closed(self):
+        pass
+
+
+def fake_pool_manager(name="primary", responses=None, **kwargs):
+    """A real PoolManager whose pools are FakeMySQLPools (kept in `.pools`),
+    with the background tasks turned off."""
+    kwargs.setdefault("liveness_interval", 0)
+    kwargs.setdefault("stats_log_interval", 0)
+    manager = PoolManager("localhost", 3306, None, None, None, name=name, **kwargs)
+    manager.pools = []
+    manager.create_error = None
+    manager.create_attempts = 0
+
+    async def create_pool():
+        manager.create_attempts += 1
+        # Yield like a real connect, so concurrent callers overlap
+        await asyncio.sleep(0.01)
+        if manager.create_error is not None:
+            raise manager.create_error
+        pool = FakeMySQLPool(manager.maxsize, responses)
+        manager.pools.append(pool)
+        return pool
+
+    manager._create_pool = create_pool
+    return manager
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class SlowModel:
+    """Stands in for the Gemini model: every call takes `delay` seconds."""
+
+    def __init__(self, delay, items=None):
+        self.delay = delay
+        self.items = items or [f"Deliver measurable outcome {i} this quarter" for i in range(8)]
+        self.started = 0
+        self.finished = 0
+
+    async def generate_content_async(self, prompt):
+        self.started += 1
+        await asyncio.sleep(self.delay)
+        self.finished += 1
+        return FakeResponse(json.dumps({"items": self.items}))
@@ -0,0 +1,64 @@
+# AI routes must hand their pooled connection back before awaiting Gemini
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiomysql")
+pytest.importorskip("fastapi")
+httpx = pytest.importorskip("httpx")
+
+from fastapi import FastAPI
+
+from backend.gemini import GeminiClient, GeminiDispatcher
+from backend.suggestion_cache import SuggestionCache
+from routes import ai_async, meta_async
+from fakes import SlowModel
+
+MODEL_DELAY = 1.0
+
+
+async def _until(predicate):
+    while not predicate():
+        await asyncio.sleep(0.01)
+
+
+def _app(pool, model):
+    app = FastAPI()
+    app.state.db_pool = pool
+    app.state.gemini_model = model
+    app.state.disable_ai = False
+    app.state.gemini = GeminiClient(model, dispatcher=GeminiDispatcher(max_in_flight=8, rate_per_minute=0))
+    app.state.suggestion_cache = SuggestionCache(pool, purge_interval=0)
+    app.include_router(ai_async.router, prefix="/api/ai")
+    app.include_router(meta_async.router, prefix="/api")
+    return app
+
+
+def test_catalog_reads_not_starved_by_slow_ai_calls(fake_pool):
+    model = SlowModel(MODEL_DELAY)
+    app = _app(fake_pool, model)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            kras = [
+                asyncio.ensure_future(client.post("/api/ai/kras", json={"profession": 1, "department": 2, "role": i}))
+                for i in range(4)
+            ]
+            # Every AI request should reach the model at once, none of them
+            # queued behind another's connection
+            await asyncio.wait_for(_until(lambda: model.started == len(kras)), timeout=MODEL_DELAY / 2)
+
+            professions = await asyncio.wait_for(client.get("/api/professions"), timeout=MODEL_DELAY / 2)
+            assert professions.status_code == 200
+            assert professions.json() == [{"id": 1, "name": "Engineering"}]
+            assert model.finished == 0, "catalog read should finish while the AI calls are in flight"
+            assert not any(t.done() for t in kras)
+
+            for resp in await asyncio.gather(*kras):
+                assert resp.status_code == 200
+                assert resp.json()["source"] == "ai"
+
+    asyncio.run(scenario())
+    assert fake_pool.max_in_use == 1
+    assert fake_pool.in_use == 0
@@ -0,0 +1,69 @@
+# /api/archetype/batch reports bad items per item and never fails the batch
+import asyncio
+import json
+import os
+
+import pytest
+
+pytest.importorskip("aiomysql")
+pytest.importorskip("fastapi")
+pytest.importorskip("google.generativeai")
+httpx = pytest.importorskip("httpx")
+
+os.environ.setdefault("DISABLE_AI", "1")
+
+import main
+
+VALID = {"profile_id": 7, "profession": 1, "department": 1, "role": 1, "skive": {"skills": {"decisionMaking": 9}}}
+
+
+def _post(body: bytes, content_type: str):
+    async def request():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/api/archetype/batch", content=body, headers={"content-type": content_type})
+
+    return asyncio.run(request())
+
+
+def _lines(response):
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_json_array_mixes_valid_and_invalid_items():
+    body = json.dumps([VALID, 5, {"profile_id": 8}, VALID]).encode()
+    lines = _lines(_post(body, "application/json"))
+    assert [line["index"] for line in lines] == [0, 1, 2, 3]
+    assert lines[0]["profile_id"] == 7 and "archetype" in lines[0]
+    assert lines[1]["error"] == "Item must be a JSON object"
+    assert "error" in lines[2]
+    assert lines[3]["archetype"] == lines[0]["archetype"]
+
+
+def test_ndjson_mixes_valid_invalid_and_undecodable_lines():
+    body = b"\n".join([
+        json.dumps(VALID).encode(),
+        b"{not json",
+        b'{"profile_id": "\xff\xfe"}',
+        b"",
+        json.dumps(VALID).encode(),
+    ])
+    lines = _lines(_post(body, "application/x-ndjson"))
+    assert [line["index"] for line in lines] == [0, 1, 2, 3]
+    assert "archetype" in lines[0]
+    assert lines[1]["error"].startswith("Invalid JSON line")
+    assert lines[2]["error"].startswith("Line is not valid UTF-8")
+    assert "archetype" in lines[3]
+
+
+def test_undecodable_json_array_is_a_400():
+    body = b'[{"profile_id": "\xff"}]'
+    response = _post(body, "application/json")
+    assert response.status_code == 400
+    assert "UTF-8" in response.json()["detail"]
+
+
+def test_malformed_json_array_is_a_400():
+    response = _post(b"[1, 2", "application/json")
+    assert response.status_code == 400
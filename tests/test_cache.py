@@ -0,0 +1,31 @@
+from backend.cache import VersionTable
+
+
+def test_version_table_stays_bounded():
+    versions = VersionTable(maxsize=3)
+    for pid in range(100):
+        versions.bump(pid)
+    assert len(versions) == 3
+    assert versions.evictions == 97
+
+
+def test_evicted_keys_never_return_to_an_older_version():
+    versions = VersionTable(maxsize=2)
+    assert versions.get("a") == 0
+    versions.bump("a")
+    cached_under = versions.get("a")
+    versions.bump("b")
+    versions.bump("c")  # evicts "a"
+    assert versions.get("a") >= cached_under
+    # A key that was never bumped can't collide with anything cached before
+    assert versions.get("never-seen") >= cached_under
+    # Recently used keys keep their own counter
+    assert versions.get("c") > versions.get("b")
+
+
+def test_bump_returns_the_replaced_version():
+    versions = VersionTable(maxsize=2)
+    first = versions.bump("a")
+    second = versions.bump("a")
+    assert first == 0
+    assert second == versions.get("a") - 1
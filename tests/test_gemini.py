@@ -0,0 +1,201 @@
+import asyncio
+import time
+
+import pytest
+
+from backend.gemini import GeminiBusy, GeminiDispatcher, SingleFlight
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+async def _hold(release: asyncio.Event, result="held"):
+    await release.wait()
+    return result
+
+
+def test_dispatcher_rejects_when_queue_is_full():
+    async def scenario():
+        dispatcher = GeminiDispatcher(max_in_flight=1, max_queue=0, queue_timeout=1, rate_per_minute=0)
+        release = asyncio.Event()
+        first = asyncio.ensure_future(dispatcher.run(lambda: _hold(release)))
+        await asyncio.sleep(0)
+        started = time.monotonic()
+        with pytest.raises(GeminiBusy):
+            await dispatcher.run(lambda: _hold(release))
+        assert time.monotonic() - started < 0.05
+        release.set()
+        assert await first == "held"
+        return dispatcher
+
+    dispatcher = _run(scenario())
+    assert dispatcher.rejected_queue_full == 1
+    assert dispatcher.calls == 1
+
+
+def test_dispatcher_rejects_after_queue_deadline():
+    async def scenario():
+        dispatcher = GeminiDispatcher(max_in_flight=1, max_queue=4, queue_timeout=0.05, rate_per_minute=0)
+        release = asyncio.Event()
+        first = asyncio.ensure_future(dispatcher.run(lambda: _hold(release)))
+        await asyncio.sleep(0)
+        with pytest.raises(GeminiBusy):
+            await dispatcher.run(lambda: _hold(release))
+        assert dispatcher.queued == 0
+        release.set()
+        await first
+        return dispatcher
+
+    dispatcher = _run(scenario())
+    assert dispatcher.rejected_deadline == 1
+
+
+def test_dispatcher_waits_for_the_token_bucket_without_holding_a_slot():
+    async def scenario():
+        # 10 calls/s, burst 1: the second call waits ~0.1 s for a token
+        dispatcher = GeminiDispatcher(max_in_flight=1, queue_timeout=1, rate_per_minute=600, burst=1)
+
+        async def call():
+            return "ok"
+
+        assert await dispatcher.run(call) == "ok"
+        started = time.monotonic()
+        second = asyncio.ensure_future(dispatcher.run(call))
+        await asyncio.sleep(0.02)
+        assert dispatcher.rate_limited == 1
+        assert not dispatcher.slots.locked()
+        assert await second == "ok"
+        assert time.monotonic() - started >= 0.08
+        return dispatcher
+
+    dispatcher = _run(scenario())
+    assert dispatcher.calls == 2
+
+
+def test_dispatcher_deadline_counts_rate_limit_and_slot_waits_together():
+    async def scenario():
+        dispatcher = GeminiDispatcher(max_in_flight=1, queue_timeout=0.2, rate_per_minute=600, burst=1)
+        release = asyncio.Event()
+        first = asyncio.ensure_future(dispatcher.run(lambda: _hold(release)))
+        await asyncio.sleep(0)
+        # ~0.1 s for a token, then the slot is still busy until the deadline
+        started = time.monotonic()
+        with pytest.raises(GeminiBusy):
+            await dispatcher.run(lambda: _hold(release))
+        waited = time.monotonic() - started
+        release.set()
+        await first
+        return dispatcher, waited
+
+    dispatcher, waited = _run(scenario())
+    assert waited < 0.25
+    assert dispatcher.rate_limited == 1
+    assert dispatcher.rejected_deadline == 1
+
+
+def test_dispatcher_rejects_rate_limit_wait_past_deadline_and_refunds_token():
+    async def scenario():
+        dispatcher = GeminiDispatcher(max_in_flight=4, queue_timeout=0.05, rate_per_minute=60, burst=1)
+
+        async def call():
+            return "ok"
+
+        await dispatcher.run(call)
+        tokens = dispatcher.bucket._tokens
+        with pytest.raises(GeminiBusy):
+            await dispatcher.run(call)
+        assert dispatcher.bucket._tokens == pytest.approx(tokens, abs=0.01)
+        return dispatcher
+
+    dispatcher = _run(scenario())
+    assert dispatcher.rejected_deadline == 1
+    assert dispatcher.calls == 1
+
+
+def test_single_flight_collapses_concurrent_calls():
+    async def scenario():
+        flights = SingleFlight()
+        calls = 0
+        release = asyncio.Event()
+
+        async def call():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return "shared"
+
+        waiters = [asyncio.ensure_future(flights.do("k", call)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        assert await asyncio.gather(*waiters) == ["shared"] * 3
+        return flights, calls
+
+    flights, calls = _run(scenario())
+    assert calls == 1
+    assert flights.stats() == {"calls": 1, "collapsed": 2, "in_flight": 0}
+
+
+def test_single_flight_cancelling_one_waiter_keeps_the_call_for_the_rest():
+    async def scenario():
+        flights = SingleFlight()
+        release = asyncio.Event()
+        waiters = [asyncio.ensure_future(flights.do("k", lambda: _hold(release, "shared"))) for _ in range(3)]
+        await asyncio.sleep(0)
+        waiters[0].cancel()
+        await asyncio.sleep(0)
+        assert flights.stats()["in_flight"] == 1
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await waiters[0]
+        assert await asyncio.gather(*waiters[1:]) == ["shared", "shared"]
+
+    _run(scenario())
+
+
+def test_single_flight_cancelling_every_waiter_cancels_the_call():
+    async def scenario():
+        flights = SingleFlight()
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def call():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        waiters = [asyncio.ensure_future(flights.do("k", call)) for _ in range(2)]
+        await started.wait()
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+        assert flights.stats()["in_flight"] == 0
+        # The key is free: a new caller starts a fresh call
+        assert await flights.do("k", lambda: asyncio.sleep(0, result="fresh")) == "fresh"
+        return flights
+
+    flights = _run(scenario())
+    assert flights.calls == 2
+
+
+def test_single_flight_exception_reaches_every_waiter():
+    async def scenario():
+        flights = SingleFlight()
+        release = asyncio.Event()
+
+        async def call():
+            await release.wait()
+            raise ValueError("model failed")
+
+        waiters = [asyncio.ensure_future(flights.do("k", call)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        assert all(isinstance(r, ValueError) and str(r) == "model failed" for r in results)
+        assert flights.stats()["in_flight"] == 0
+
+    _run(scenario())
@@ -0,0 +1,63 @@
+# Background liveness check for idle pooled connections
+import asyncio
+
+import pytest
+
+aiomysql = pytest.importorskip("aiomysql")
+
+from fakes import fake_pool_manager
+
+
+async def _started(**kwargs):
+    manager = fake_pool_manager(idle_check_after=60, **kwargs)
+    await manager.start()
+    return manager
+
+
+def test_idle_connections_behind_a_recent_one_are_pinged():
+    async def scenario():
+        manager = await _started()
+        pool = manager.pool
+        # start() left one recently used connection at the front of the free list
+        assert pool.freesize == 1
+        recent = pool._free[0]
+        idle = pool.add_idle(2, idle_for=120)
+        await manager._check_idle_connections()
+        assert [c.pings for c in idle] == [1, 1]
+        assert recent.pings == 0
+        assert pool.freesize == 3 and not pool._used
+        await manager.close()
+
+    asyncio.run(scenario())
+
+
+def test_pinged_connections_are_not_pinged_again_until_idle_again():
+    async def scenario():
+        manager = await _started()
+        idle = manager.pool.add_idle(2, idle_for=120)
+        await manager._check_idle_connections()
+        await manager._check_idle_connections()
+        assert [c.pings for c in idle] == [1, 1]
+        # Once the recorded ping is itself older than idle_check_after, ping again
+        for conn in idle:
+            manager._pinged_at[conn] -= 61
+        await manager._check_idle_connections()
+        assert [c.pings for c in idle] == [2, 2]
+        await manager.close()
+
+    asyncio.run(scenario())
+
+
+def test_dead_idle_connections_are_dropped():
+    async def scenario():
+        manager = await _started()
+        pool = manager.pool
+        dead, alive = pool.add_idle(2, idle_for=120)
+        dead.ping_error = aiomysql.OperationalError(2013, "Lost connection")
+        await manager._check_idle_connections()
+        assert dead.closed and dead not in pool._free
+        assert alive in pool._free
+        assert dead not in manager._pinged_at
+        await manager.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,79 @@
+# PoolManager.rebuild: one rebuild per broken generation, shared failures, backoff
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiomysql")
+
+from fakes import fake_pool_manager
+
+CALLERS = 10
+
+
+def test_concurrent_rebuilds_create_one_pool():
+    async def scenario():
+        manager = fake_pool_manager(rebuild_backoff=0.05)
+        await manager.start()
+        first = manager.pool
+        generation = manager.generation
+        await asyncio.gather(*(manager.rebuild(generation) for _ in range(CALLERS)))
+        assert manager.create_attempts == 2  # start + exactly one rebuild
+        assert manager.generation == generation + 1
+        assert manager.rebuilds == 1
+        assert first.closed and not manager.pool.closed
+        # A caller that saw the old generation later just uses the replacement
+        await manager.rebuild(generation)
+        assert manager.create_attempts == 2
+        await manager.close()
+
+    asyncio.run(scenario())
+
+
+def test_rebuild_failure_reaches_every_waiting_caller():
+    async def scenario():
+        manager = fake_pool_manager(rebuild_backoff=0.05)
+        await manager.start()
+        manager.create_error = OSError("primary down")
+        results = await asyncio.gather(
+            *(manager.rebuild(manager.generation) for _ in range(CALLERS)), return_exceptions=True
+        )
+        assert all(isinstance(r, OSError) and str(r) == "primary down" for r in results)
+        assert manager.create_attempts == 2  # start + one failed attempt, shared
+        assert manager.rebuild_failures == 1
+        assert manager.generation == 0
+        await manager.close()
+
+    asyncio.run(scenario())
+
+
+def test_rebuild_attempts_respect_the_backoff_window():
+    async def scenario():
+        manager = fake_pool_manager(rebuild_backoff=0.1, rebuild_backoff_max=1.0)
+        await manager.start()
+        manager.create_error = OSError("primary down")
+        with pytest.raises(OSError):
+            await manager.rebuild()
+        attempts = manager.create_attempts
+        # Inside the window: the last error, without another connect
+        with pytest.raises(OSError):
+            await manager.rebuild()
+        assert manager.create_attempts == attempts
+        await asyncio.sleep(0.12)
+        # Window over: one more attempt, which fails and doubles the window
+        with pytest.raises(OSError):
+            await manager.rebuild()
+        assert manager.create_attempts == attempts + 1
+        await asyncio.sleep(0.12)
+        with pytest.raises(OSError):
+            await manager.rebuild()
+        assert manager.create_attempts == attempts + 1
+        # Once the database is back, the next attempt after the window succeeds
+        manager.create_error = None
+        await asyncio.sleep(0.1)
+        await manager.rebuild()
+        assert manager.create_attempts == attempts + 2
+        assert manager.generation == 1
+        assert manager._last_rebuild_error is None
+        await manager.close()
+
+    asyncio.run(scenario())
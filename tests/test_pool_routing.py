@@ -0,0 +1,96 @@
+# Read/write split between the primary and the read replica
+import asyncio
+
+import pytest
+
+aiomysql = pytest.importorskip("aiomysql")
+
+from fakes import fake_pool_manager
+
+
+def _managers(read_your_writes=0.2):
+    primary = fake_pool_manager("primary")
+    primary.replica = fake_pool_manager("replica")
+    primary.read_your_writes_seconds = read_your_writes
+    return primary
+
+
+async def _checkout_pool(cm, manager):
+    """Which manager's pool served the connection checked out by `cm`."""
+    async with cm as conn:
+        for candidate in (manager, manager.replica):
+            if candidate is not None and conn.raw in candidate.pool._used:
+                return candidate.name
+
+
+def test_reads_go_to_the_replica_and_writes_to_the_primary():
+    async def scenario():
+        primary = _managers()
+        await primary.start()
+        assert await _checkout_pool(primary.read_connection("a"), primary) == "replica"
+        assert await _checkout_pool(primary.write_connection("a"), primary) == "primary"
+        assert await _checkout_pool(primary.connection(), primary) == "primary"
+        await primary.close()
+
+    asyncio.run(scenario())
+
+
+def test_writer_reads_from_primary_for_the_read_your_writes_window():
+    async def scenario():
+        primary = _managers(read_your_writes=0.1)
+        await primary.start()
+        async with primary.write_connection("writer"):
+            pass
+        assert await _checkout_pool(primary.read_connection("writer"), primary) == "primary"
+        # Other clients are unaffected
+        assert await _checkout_pool(primary.read_connection("other"), primary) == "replica"
+        await asyncio.sleep(0.12)
+        assert await _checkout_pool(primary.read_connection("writer"), primary) == "replica"
+        await primary.close()
+
+    asyncio.run(scenario())
+
+
+def test_reads_fall_back_to_primary_when_replica_fails_at_startup():
+    async def scenario():
+        primary = _managers()
+        primary.replica.create_error = OSError("replica down")
+        await primary.start()
+        assert primary.replica is None
+        assert await _checkout_pool(primary.read_connection("a"), primary) == "primary"
+        await primary.close()
+
+    asyncio.run(scenario())
+
+
+def test_reads_fall_back_to_primary_when_replica_checkout_fails():
+    async def scenario():
+        primary = _managers()
+        primary.replica_retry_seconds = 0.1
+        await primary.start()
+        primary.replica.pool.acquire_error = aiomysql.OperationalError(2003, "Can't connect")
+        assert await _checkout_pool(primary.read_connection("a"), primary) == "primary"
+        assert primary.replica_fallbacks == 1
+        # The replica is skipped, not retried on every read, until the window ends
+        primary.replica.pool.acquire_error = None
+        assert await _checkout_pool(primary.read_connection("a"), primary) == "primary"
+        await asyncio.sleep(0.12)
+        assert await _checkout_pool(primary.read_connection("a"), primary) == "replica"
+        assert primary.replica_fallbacks == 1
+        await primary.close()
+
+    asyncio.run(scenario())
+
+
+def test_errors_inside_a_replica_read_are_not_retried_on_the_primary():
+    async def scenario():
+        primary = _managers()
+        await primary.start()
+        with pytest.raises(ValueError):
+            async with primary.read_connection("a"):
+                raise ValueError("handler failed")
+        assert primary.replica_fallbacks == 0
+        assert primary.replica.pool.size == primary.replica.pool.freesize
+        await primary.close()
+
+    asyncio.run(scenario())
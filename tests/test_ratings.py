@@ -0,0 +1,23 @@
+from backend.ratings import Rating, canonical_ratings, ratings_fingerprint
+from models.competency_keys import CompetencyKeys
+from models.phrase_library import PhraseIndex
+
+
+def test_spelling_variants_share_a_fingerprint():
+    title = [Rating("skills", "Decision Making", 9), Rating("values", "Integrity", 7)]
+    camel = [Rating("values", "integrity", 7), Rating("Skills", "decisionMaking", 9)]
+    assert ratings_fingerprint(title) == ratings_fingerprint(camel)
+    assert [r.key for r in canonical_ratings(camel)] == [r.key for r in canonical_ratings(title)]
+
+
+def test_phrase_lookup_by_key_does_not_recount(monkeypatch):
+    keys = CompetencyKeys()
+    index = PhraseIndex([("skills", "Decision Making", "high", "decides well", "signature")], keys=keys)
+    monkeypatch.setattr("backend.ratings.COMPETENCY_KEYS", keys)
+    rating = Rating("skills", "decisionMaking", 9)
+    assert keys.resolved == 1
+    assert index.get(rating.category, rating.key, rating.tier, "signature") == "decides well"
+    ratings_fingerprint([rating])
+    canonical_ratings([rating])
+    assert keys.resolved == 1
+    assert keys.unknown == 0